@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from state import State, Arrival
+
+
+class DelaySummary:
+    """Count, mean, maximum and number of delayed/early stops of a set of arrivals."""
+    __slots__ = ('count', 'total', 'max_delay', 'delayed', 'early')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max_delay = None
+        self.delayed = 0
+        self.early = 0
+
+    def add(self, delay):
+        self.count += 1
+        self.total += delay
+        if self.max_delay is None or delay > self.max_delay:
+            self.max_delay = delay
+        if delay > 60:
+            self.delayed += 1
+        elif delay <= -60:
+            self.early += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        if other.max_delay is not None and (self.max_delay is None or other.max_delay > self.max_delay):
+            self.max_delay = other.max_delay
+        self.delayed += other.delayed
+        self.early += other.early
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def as_dict(self) -> dict:
+        return {'count': self.count, 'mean': self.mean(), 'max': self.max_delay, 'delayed': self.delayed,
+                'early': self.early}
+
+
+class Report:
+    def __init__(self):
+        self.files = []
+        self.lines = 0
+        self.contracts = {}  # (history name, contract id) -> DelaySummary, contract ids are only unique per map
+        self.stations = {}  # station name -> DelaySummary
+        self.errors = []  # (history name, error) of the files that could not be read
+
+    def add_stop(self, name, cid, location, delay):
+        self.contracts.setdefault((name, cid), DelaySummary()).add(delay)
+        self.stations.setdefault(location, DelaySummary()).add(delay)
+
+    def merge(self, other):
+        self.files.extend(other.files)
+        self.errors.extend(other.errors)
+        self.lines += other.lines
+        for key, summary in other.contracts.items():
+            self.contracts.setdefault(key, DelaySummary()).merge(summary)
+        for station, summary in other.stations.items():
+            self.stations.setdefault(station, DelaySummary()).merge(summary)
+
+    def as_dict(self) -> dict:
+        return {
+            'files': self.files,
+            'errors': [{'file': name, 'error': error} for name, error in self.errors],
+            'lines': self.lines,
+            'contracts': [dict(map=name, contract=cid, **summary.as_dict())
+                          for (name, cid), summary in sorted(self.contracts.items())],
+            'stations': [dict(station=station, **summary.as_dict())
+                         for station, summary in sorted(self.stations.items())],
+        }
+
+    def format(self, top=20) -> list:
+        lines = [f'{len(self.files)} history files, {self.lines} lines, {len(self.contracts)} contracts, '
+                 f'{len(self.stations)} stations']
+        lines.extend(f'Skipped {name}: {error}' for name, error in self.errors)
+        for title, rows in (('Contracts', [(f'{name}:{cid}', s) for (name, cid), s in self.contracts.items()]),
+                            ('Stations', list(self.stations.items()))):
+            lines.append(f'{title} by mean delay:')
+            lines.append(f'  {"":30} {"stops":>7} {"mean":>8} {"max":>8} {"delayed":>8} {"early":>8}')
+            for key, s in sorted(rows, key=lambda row: -row[1].mean())[:top]:
+                lines.append(f'  {key[:30]:30} {s.count:7d} {s.mean():8.1f} {s.max_delay:8.0f} '
+                             f'{s.delayed:8d} {s.early:8d}')
+        return lines
+
+
+def analyze_file(path) -> Report:
+    """Replays one history file and summarises its arrivals; runs in a worker process.
+
+    The stops are taken from the arrivals as they are applied, as the state only keeps the last run of a train id.
+    """
+    name = os.path.basename(path)
+    report = Report()
+    state = State()
+    try:
+        with open(path, "r") as history_file:
+            for line in history_file:
+                event = state.process_history_line(line)
+                if isinstance(event, Arrival):
+                    report.add_stop(name, event.contract_id, event.train.current_location(),
+                                    event.train.current_delay())
+    except (OSError, ValueError) as e:
+        # one unreadable file (UnicodeDecodeError is a ValueError) must not abort the analysis of the others
+        report = Report()
+        report.errors.append((name, repr(e)))
+        return report
+    report.files.append(name)
+    report.lines = state.lines_processed
+    return report
+
+
+def is_history_file(path, tail_size=4096) -> bool:
+    """Whether path was written by the manager: every flush of the history ends with a last_read_position marker."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(max(os.fstat(f.fileno()).st_size - tail_size, 0))
+            return b'\nlast_read_position: ' in b'\n' + f.read()
+    except OSError:
+        return False
+
+
+def history_files(directory) -> list:
+    return [path for path in (os.path.join(directory, name) for name in sorted(os.listdir(directory)))
+            if os.path.isfile(path) and is_history_file(path)]
+
+
+def analyze(paths, workers=None) -> Report:
+    """Replays the history files in worker processes and merges their reports.
+
+    The largest files are started first, so the total time is close to that of the largest file.
+    """
+    paths = sorted(paths, key=os.path.getsize, reverse=True)
+    report = Report()
+    if workers == 1 or len(paths) == 1:
+        for path in paths:
+            report.merge(analyze_file(path))
+        return report
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for file_report in executor.map(analyze_file, paths):
+            report.merge(file_report)
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    import json
+    import argparse
+    parser = argparse.ArgumentParser(description="Summarise delays over the history files of several maps")
+    parser.add_argument("history_files", nargs="+", help="history files (or directories of them)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: number of CPUs)")
+    parser.add_argument("--top", type=int, default=20, help="rows per table (default: 20)")
+    parser.add_argument("--json", metavar="PATH", help="also write the full report as JSON")
+    args = parser.parse_args()
+
+    history_paths = []
+    for arg in args.history_files:
+        if os.path.isdir(arg):
+            history_paths.extend(history_files(arg))
+        else:
+            history_paths.append(arg)
+    if not history_paths:
+        print("No history files found")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    merged = analyze(history_paths, args.workers)
+    print('\n'.join(merged.format(args.top)))
+    print(f'({time.perf_counter() - start:.2f}s)')
+    if args.json:
+        with open(args.json, "w") as json_file:
+            json.dump(merged.as_dict(), json_file, indent=2)
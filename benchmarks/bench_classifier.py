@@ -0,0 +1,125 @@
+import re
+import time
+import random
+import argparse
+
+from datetime import timedelta
+
+from benchmarks.loggen import NOISE
+from logparser import classify, get_contract_id, DelayEvent
+
+
+# The per-line parsing as it was before logparser.classify, kept for comparison.
+def legacy_parse_log_line(line):
+    match = re.search(r'Delay for train (.+?)\[(.+?)]: ([^$]+)', line)
+    if match:
+        train_id = match.group(1)
+        location = match.group(2)
+        delay_str = match.group(3).strip()
+        multiplier = 1
+
+        try:
+            if delay_str[0] == '-':
+                multiplier = -1
+                delay_str = delay_str[1:]
+            delay = timedelta(hours=int(delay_str[0:2]), minutes=int(delay_str[3:5]),
+                              seconds=int(delay_str[6:8]))
+            delay_in_seconds = delay.total_seconds() * multiplier
+        except ValueError:
+            delay_in_seconds = 0
+
+        return train_id, location, delay_in_seconds
+    return None
+
+
+def legacy_parse_bad_platform(line):
+    match = re.search(r'Bad platform for train (.+)', line)
+    if match:
+        return match.group(1)
+    return None
+
+
+def legacy_get_contract_id(train_id):
+    match = re.search(r'([A-Za-z]+)(\d{3})', train_id)
+    if match:
+        if match.group(1) == 'Reg':
+            return match.group(1), match.group(2) + train_id[6]
+        else:
+            return match.group(1), match.group(2)
+    raise ValueError
+
+
+def legacy_process_marker(line):
+    match = re.search(r'last_read_position: (\d+) of (\d+)', line)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    return 0, None
+
+
+def synthetic_lines(num_lines, noise_ratio=0.9, seed=1):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(num_lines):
+        r = rng.random()
+        if r < noise_ratio:
+            lines.append(rng.choice(NOISE))
+        elif r < noise_ratio + (1 - noise_ratio) * 0.95:
+            sign = '-' if rng.random() < 0.2 else ''
+            delay = rng.randrange(0, 600)
+            prefix = rng.choice(['IC', 'Reg', 'S'])
+            number = rng.randrange(100, 1000)
+            train_id = f'{prefix}{number}A{rng.randrange(10)}' if prefix == 'Reg' else f'{prefix}{number}-{rng.randrange(10)}'
+            lines.append(f'Delay for train {train_id}[Station {rng.randrange(40)}]: '
+                         f'{sign}00:{delay // 60:02d}:{delay % 60:02d}\n')
+        elif rng.random() < 0.5:
+            lines.append(f'Bad platform for train IC{rng.randrange(100, 1000)}-1\n')
+        else:
+            lines.append(f'last_read_position: {rng.randrange(10 ** 6)} of {rng.randrange(10 ** 6)}\n')
+    return lines
+
+
+def legacy(lines):
+    events = 0
+    for line in lines:
+        parsed = legacy_parse_log_line(line)
+        if parsed:
+            legacy_get_contract_id(parsed[0])
+            events += 1
+        elif legacy_parse_bad_platform(line):
+            events += 1
+        if legacy_process_marker(line)[1] is not None:
+            events += 1
+    return events
+
+
+def classifier(lines):
+    events = 0
+    for line in lines:
+        event = classify(line)
+        if event is not None:
+            if isinstance(event, DelayEvent):
+                get_contract_id(event.train_id)
+            events += 1
+    return events
+
+
+def measure(func, lines):
+    start = time.perf_counter()
+    events = func(lines)
+    return events, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the line classifier with the previous per-line parsing")
+    parser.add_argument("--lines", type=int, default=1_000_000)
+    parser.add_argument("--noise", type=float, default=0.9, help="ratio of lines that are not game events")
+    args = parser.parse_args()
+
+    log_lines = synthetic_lines(args.lines, args.noise)
+    legacy_events, legacy_seconds = measure(legacy, log_lines)
+    events_found, classify_seconds = measure(classifier, log_lines)
+    assert events_found == legacy_events
+    print(f'{args.lines} lines, {events_found} events')
+    print(f'  legacy:     {legacy_seconds:.3f}s ({args.lines / legacy_seconds:,.0f} lines/s)')
+    print(f'  classifier: {classify_seconds:.3f}s ({args.lines / classify_seconds:,.0f} lines/s)')
+    print(f'  speed-up:   {legacy_seconds / classify_seconds:.1f}x')
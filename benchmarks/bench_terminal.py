@@ -0,0 +1,104 @@
+import os
+import pty
+import sys
+import time
+import fcntl
+import select
+import struct
+import termios
+import argparse
+
+from benchmarks.loggen import generate, add_arguments, generator_params
+from state import State
+
+
+def _render_frames(stdscr, lines, frames, ready, go):
+    from mainwindow import Window
+    from monitor_log import update_pads
+    import curses
+
+    curses.curs_set(0)
+    if curses.has_colors():
+        curses.start_color()
+    state = State()
+    half = len(lines) // 2
+    for line in lines[:half]:
+        state.process_line(line)
+    chunk_size = max(1, (len(lines) - half) // frames)
+    chunks = [lines[start:start + chunk_size] for start in range(half, len(lines), chunk_size)][:frames]
+
+    w = Window(stdscr)
+    update_pads(state, w)
+    w.redraw_pads()
+    os.write(ready, b'r')
+    os.read(go, 1)
+    for chunk in chunks:
+        for line in chunk:
+            state.process_line(line)
+        update_pads(state, w)
+        w.redraw_pads(full=False)
+    os.write(ready, str(len(chunks)).encode())
+    os.read(go, 1)
+
+
+def _drain(fd, timeout=0.2):
+    """Reads what the terminal has received until it is quiet; returns the number of bytes."""
+    received = 0
+    while select.select([fd], [], [], timeout)[0]:
+        try:
+            data = os.read(fd, 65536)
+        except OSError:
+            break
+        if not data:
+            break
+        received += len(data)
+    return received
+
+
+def measure(lines, frames, size=(50, 160)) -> dict:
+    """Renders frames into a pseudo-terminal and counts the bytes curses writes to it."""
+    import curses
+    ready_r, ready_w = os.pipe()
+    go_r, go_w = os.pipe()
+    pid, master = pty.fork()
+    if pid == 0:
+        try:
+            fcntl.ioctl(sys.stdout.fileno(), termios.TIOCSWINSZ, struct.pack('HHHH', size[0], size[1], 0, 0))
+            os.environ['TERM'] = 'xterm'
+            os.environ['LINES'], os.environ['COLUMNS'] = str(size[0]), str(size[1])
+            curses.wrapper(_render_frames, lines, frames, ready_w, go_r)
+        finally:
+            os._exit(0)
+
+    received = 0
+    while not select.select([ready_r], [], [], 0)[0]:
+        received += _drain(master, 0.05)
+    os.read(ready_r, 1)
+    setup_bytes = received + _drain(master)
+    start = time.perf_counter()
+    os.write(go_w, b'g')
+    received = 0
+    while not select.select([ready_r], [], [], 0)[0]:
+        received += _drain(master, 0.05)
+    seconds = time.perf_counter() - start
+    rendered = int(os.read(ready_r, 16))
+    received += _drain(master)
+    os.write(go_w, b'g')
+    _drain(master)
+    os.waitpid(pid, 0)
+    for fd in (ready_r, ready_w, go_r, go_w, master):
+        os.close(fd)
+    return {'seconds': seconds, 'frames': rendered, 'setup_bytes': setup_bytes,
+            'bytes_per_frame': received / rendered}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Terminal bytes per frame of the user interface")
+    add_arguments(parser)
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    log_lines = list(generate(**generator_params(args)))
+    result = measure(log_lines, args.frames)
+    print(f'{result["bytes_per_frame"]:,.0f} bytes/frame, {result["frames"]} frames in {result["seconds"]:.3f}s, '
+          f'{result["setup_bytes"]:,} bytes for the first frame')
@@ -0,0 +1,56 @@
+import argparse
+import tracemalloc
+
+from collections import namedtuple
+from datetime import datetime
+
+from train import Train
+
+LegacyStop = namedtuple("LegacyStop", ["location", "delay"])
+
+
+# Train as it was before the __slots__/array layout, kept for comparison.
+class LegacyTrain:
+    def __init__(self, train_id, location, delay):
+        self.tid = train_id
+        self._locations = [LegacyStop(location, delay)]
+        self._tob = datetime.utcnow()
+        self.done = False
+
+    def new_location(self, location, delay):
+        self._locations.append(LegacyStop(location, delay))
+
+
+def session(train_class, num_trains, route_length, num_stations):
+    # location strings are created per line, just like the parser does
+    trains = []
+    for idx in range(num_trains):
+        train = train_class(f'IC{100 + idx % 900}-{idx}', f'Station {idx % num_stations}', float(idx % 300))
+        for stop in range(1, route_length):
+            train.new_location(f'Station {(idx + stop) % num_stations}', float((idx * stop) % 300 - 100))
+        trains.append(train)
+    return trains
+
+
+def bytes_per_train(train_class, num_trains, route_length, num_stations):
+    session(train_class, 10, route_length, num_stations)  # intern the station names outside of the measurement
+    tracemalloc.start()
+    trains = session(train_class, num_trains, route_length, num_stations)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del trains
+    return current / num_trains
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Memory used per train for a session")
+    parser.add_argument("--trains", type=int, default=10_000)
+    parser.add_argument("--route-length", type=int, default=12)
+    parser.add_argument("--stations", type=int, default=80)
+    args = parser.parse_args()
+
+    legacy = bytes_per_train(LegacyTrain, args.trains, args.route_length, args.stations)
+    compact = bytes_per_train(Train, args.trains, args.route_length, args.stations)
+    print(f'{args.trains} trains, {args.route_length} stops each')
+    print(f'  legacy:  {legacy:,.0f} bytes/train')
+    print(f'  compact: {compact:,.0f} bytes/train ({legacy / compact:.1f}x smaller)')
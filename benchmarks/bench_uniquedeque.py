@@ -0,0 +1,63 @@
+import time
+import random
+import argparse
+
+from collections import deque
+
+from uniquedeque import UniqueDeque
+
+
+# UniqueDeque as it was before the OrderedDict layout, kept for comparison.
+class LegacyUniqueDeque:
+    def __init__(self, max_length):
+        self.deque = deque(maxlen=max_length)
+        self.items_set = set()
+
+    def append_left(self, item):
+        if item not in self.items_set:
+            if len(self.deque) >= self.deque.maxlen:
+                self.items_set.remove(self.deque.pop())
+            self.deque.appendleft(item)
+            self.items_set.add(item)
+            return True
+        return False
+
+    def remove(self, item):
+        if item not in self.items_set:
+            return False
+        self.items_set.remove(item)
+        self.deque.remove(item)
+        return True
+
+
+def workload(size, num_operations, seed=1):
+    # like removed_trains: mostly new items, and removals of items anywhere in the buffer
+    rng = random.Random(seed)
+    return [(rng.random() < 0.3, rng.randrange(size * 2)) for _ in range(num_operations)]
+
+
+def measure(deque_class, size, operations):
+    unique = deque_class(max_length=size)
+    for item in range(size):
+        unique.append_left(item)
+    start = time.perf_counter()
+    for remove, item in operations:
+        if remove:
+            unique.remove(item)
+        else:
+            unique.append_left(item)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare UniqueDeque with the previous deque based version")
+    parser.add_argument("--operations", type=int, default=20_000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1_000, 10_000, 100_000])
+    args = parser.parse_args()
+
+    for buffer_size in args.sizes:
+        ops = workload(buffer_size, args.operations)
+        legacy = measure(LegacyUniqueDeque, buffer_size, ops)
+        current = measure(UniqueDeque, buffer_size, ops)
+        print(f'size {buffer_size:>7}: legacy {legacy * 1e6 / args.operations:8.2f} us/op, '
+              f'ordered dict {current * 1e6 / args.operations:6.2f} us/op ({legacy / current:.1f}x)')
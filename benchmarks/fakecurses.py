@@ -0,0 +1,100 @@
+import curses
+
+from contextlib import contextmanager
+
+
+class FakeWindow:
+    """Stands in for curses windows and pads, counting the calls and characters written.
+
+    If the screen records, every call is also kept in calls as (name, *args) for the tests.
+    """
+    def __init__(self, screen, lines, cols):
+        self._screen = screen
+        self._lines = lines
+        self._cols = cols
+        self.calls = [] if screen.record else None
+
+    def _record(self, name, args):
+        if self.calls is not None:
+            self.calls.append((name,) + args)
+
+    def getmaxyx(self):
+        return self._lines, self._cols
+
+    def addstr(self, *args):
+        self._record('addstr', args)
+        self._screen.calls += 1
+        self._screen.chars_written += len(args[2] if isinstance(args[0], int) else args[0])
+
+    def addch(self, *args):
+        self._record('addch', args)
+        self._screen.calls += 1
+        self._screen.chars_written += 1
+
+    def refresh(self, *args):
+        self._record('refresh', args)
+        self._screen.refreshes += 1
+
+    def noutrefresh(self, *args):
+        self._record('noutrefresh', args)
+        self._screen.refreshes += 1
+
+    def __getattr__(self, name):
+        def call(*args):
+            self._record(name, args)
+            self._screen.calls += 1
+        return call
+
+
+class FakeScreen:
+    def __init__(self, lines, cols, record=False):
+        self.lines = lines
+        self.cols = cols
+        self.record = record
+        self.calls = 0
+        self.chars_written = 0
+        self.refreshes = 0
+        self.stdscr = FakeWindow(self, lines, cols)
+
+    def new_window(self, lines, cols, *args):
+        return FakeWindow(self, lines, cols)
+
+    def reset_counters(self):
+        self.calls = 0
+        self.chars_written = 0
+        self.refreshes = 0
+
+
+def replacements(screen) -> dict:
+    """The curses functions and constants the user interface uses, backed by screen."""
+    return {
+        'LINES': screen.lines,
+        'COLS': screen.cols,
+        'newpad': screen.new_window,
+        'newwin': screen.new_window,
+        'init_pair': lambda *args: None,
+        'color_pair': lambda index: index << 8,
+        'update_lines_cols': lambda: None,
+        'resizeterm': lambda *args: None,
+        'doupdate': lambda: None,
+        'ACS_CKBOARD': ord('#'),
+        'A_REVERSE': 1 << 18,
+    }
+
+
+@contextmanager
+def fake_curses(lines=50, cols=200):
+    """Replaces the curses functions the user interface uses, so that Window can be driven without a terminal."""
+    screen = FakeScreen(lines, cols)
+    fakes = replacements(screen)
+    saved = {name: getattr(curses, name) for name in fakes if hasattr(curses, name)}
+    for name, value in fakes.items():
+        setattr(curses, name, value)
+    try:
+        yield screen
+    finally:
+        for name in fakes:
+            if name in saved:
+                setattr(curses, name, saved[name])
+            else:
+                delattr(curses, name)
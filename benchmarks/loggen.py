@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+import random
+import argparse
+
+NOISE = [
+    "UnityEngine.Logger:Log(LogType, Object)\n",
+    "(Filename: ./Runtime/Export/Debug/Debug.bindings.h Line: 35)\n",
+    "\n",
+    "Unloading 5 unused Assets to reduce memory usage. Loaded Objects now: 9184.\n",
+    "Total: 12.484900 ms (FindLiveObjects: 0.742600 ms CreateObjectsLookup: 0.301100 ms)\n",
+]
+PREFIXES = ['IC', 'EC', 'S', 'RE']
+
+
+def format_delay(delay):
+    sign = '-' if delay < 0 else ''
+    delay = abs(int(delay))
+    return f'{sign}{delay // 3600:02d}:{delay % 3600 // 60:02d}:{delay % 60:02d}'
+
+
+def make_contracts(rng, num_contracts, route_length, num_stations, reg_ratio):
+    contracts = []  # (train id prefix, route)
+    number = 100
+    while len(contracts) < num_contracts:
+        length = max(1, min(num_stations, round(rng.gauss(route_length, route_length / 4))))
+        if rng.random() < reg_ratio:
+            # regional contracts are split into segments A, B, ... which share the contract number
+            for segment in 'AB'[:num_contracts - len(contracts)]:
+                contracts.append((f'Reg{number}{segment}', rng.sample(range(num_stations), length)))
+        else:
+            contracts.append((f'{rng.choice(PREFIXES)}{number}-', rng.sample(range(num_stations), length)))
+        number += 1
+    return contracts
+
+
+def generate(contracts=20, trains_per_contract=10, route_length=8, delay_mean=30, delay_stddev=90, noise_ratio=0.8,
+             reg_ratio=0.25, stations=60, concurrent_trains=3, seed=1):
+    """Yields the lines of a deterministic, Player.log like stream.
+
+    Every contract runs trains_per_contract trains along its route, up to concurrent_trains at a time. The delay of a
+    train starts from a normal distribution and changes by a random walk from stop to stop. noise_ratio is the share of
+    lines that are not game events.
+    """
+    rng = random.Random(seed)
+    waiting = [[prefix, route, 0] for prefix, route in make_contracts(rng, contracts, route_length, stations, reg_ratio)]
+    running = {}  # train id -> [route, position, delay]
+    trains_running = {}  # train id prefix -> number of running trains
+
+    while waiting or running:
+        for contract in waiting:
+            prefix, route, started = contract
+            if trains_running.get(prefix, 0) < concurrent_trains:
+                running[f'{prefix}{started}'] = [route, 0, rng.gauss(delay_mean, delay_stddev)]
+                trains_running[prefix] = trains_running.get(prefix, 0) + 1
+                contract[2] += 1
+        waiting = [contract for contract in waiting if contract[2] < trains_per_contract]
+
+        train_id = rng.choice(list(running))
+        train = running[train_id]
+        route, position, delay = train
+        yield f'Delay for train {train_id}[Station {route[position]}]: {format_delay(delay)}\n'
+        if rng.random() < 0.01:
+            yield f'Bad platform for train {train_id}\n'
+        train[1] += 1
+        train[2] += rng.gauss(0, delay_stddev / 4)
+        if train[1] == len(route):
+            del running[train_id]
+            prefix = train_id.rstrip('0123456789')
+            trains_running[prefix] -= 1
+
+        # geometric number of noise lines, so that noise_ratio of all lines are noise
+        while rng.random() < noise_ratio:
+            yield rng.choice(NOISE)
+
+
+def write_log(path, **params) -> int:
+    num_lines = 0
+    with open(path, "w") as log_file:
+        for line in generate(**params):
+            log_file.write(line)
+            num_lines += 1
+    return num_lines
+
+
+def add_arguments(parser):
+    parser.add_argument("--contracts", type=int, default=20)
+    parser.add_argument("--trains-per-contract", type=int, default=10)
+    parser.add_argument("--route-length", type=int, default=8)
+    parser.add_argument("--delay-mean", type=float, default=30, help="mean initial delay in seconds")
+    parser.add_argument("--delay-stddev", type=float, default=90, help="spread of the delays in seconds")
+    parser.add_argument("--noise-ratio", type=float, default=0.8, help="share of lines that are not game events")
+    parser.add_argument("--reg-ratio", type=float, default=0.25, help="share of split regional (Reg) contracts")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def generator_params(args) -> dict:
+    return dict(contracts=args.contracts, trains_per_contract=args.trains_per_contract,
+                route_length=args.route_length, delay_mean=args.delay_mean, delay_stddev=args.delay_stddev,
+                noise_ratio=args.noise_ratio, reg_ratio=args.reg_ratio, seed=args.seed)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Write a synthetic Rail Route Player.log")
+    arg_parser.add_argument("output")
+    add_arguments(arg_parser)
+    arguments = arg_parser.parse_args()
+    print(f'Wrote {write_log(arguments.output, **generator_params(arguments))} lines to {arguments.output}')
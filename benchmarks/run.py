@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+
+from benchmarks.fakecurses import fake_curses
+from benchmarks.loggen import generate, add_arguments, generator_params
+from contract import Contract
+from logparser import classify, get_contract_id, DelayEvent
+from replay import replay
+from state import State
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_parse(lines):
+    def run():
+        return sum(1 for line in lines if classify(line) is not None)
+    events, seconds = timed(run)
+    return {'seconds': seconds, 'lines': len(lines), 'events': events, 'lines_per_second': len(lines) / seconds}
+
+
+def bench_contracts(lines):
+    arrivals = [event for event in map(classify, lines) if isinstance(event, DelayEvent)]
+
+    def run():
+        contracts = {}
+        for train_id, location, delay in arrivals:
+            contract_type, contract_id = get_contract_id(train_id)
+            if contract_id not in contracts:
+                contracts[contract_id] = Contract(contract_id, contract_type)
+            contracts[contract_id].new_location_for_train(train_id, location, delay)
+            contracts[contract_id].purge_trains()
+        return contracts
+    _, seconds = timed(run)
+    return {'seconds': seconds, 'arrivals': len(arrivals), 'arrivals_per_second': len(arrivals) / seconds}
+
+
+def bench_render(lines, frames):
+    from mainwindow import Window
+    from monitor_log import update_pads
+
+    # start from the state half way through the log and render a frame after each chunk of the remaining lines
+    state = State()
+    half = len(lines) // 2
+    for line in lines[:half]:
+        state.process_line(line)
+    chunk_size = max(1, (len(lines) - half) // frames)
+    chunks = [lines[start:start + chunk_size] for start in range(half, len(lines), chunk_size)][:frames]
+    seconds = 0
+    with fake_curses() as screen:
+        w = Window(screen.stdscr)
+        screen.reset_counters()
+        for chunk in chunks:
+            for line in chunk:
+                state.process_line(line)
+            _, frame_seconds = timed(update_pads, state, w)
+            seconds += frame_seconds
+            _, frame_seconds = timed(w.redraw_pads)
+            seconds += frame_seconds
+    frames = len(chunks)
+    return {'seconds': seconds, 'frames': frames, 'frames_per_second': frames / seconds,
+            'curses_calls_per_frame': screen.calls / frames, 'chars_per_frame': screen.chars_written / frames}
+
+
+def bench_replay(lines):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'history.log')
+        with open(path, "w") as history_file:
+            history_file.writelines(lines)
+        _, seconds = timed(replay, path)
+    return {'seconds': seconds, 'lines': len(lines), 'lines_per_second': len(lines) / seconds}
+
+
+def bench_terminal(lines, frames):
+    from benchmarks.bench_terminal import measure
+    return measure(lines, frames)
+
+
+BENCHMARKS = ['parse', 'contracts', 'render', 'terminal', 'replay']
+
+
+def run_benchmarks(names, lines, frames) -> dict:
+    results = {}
+    for name in names:
+        if name == 'parse':
+            results[name] = bench_parse(lines)
+        elif name == 'contracts':
+            results[name] = bench_contracts(lines)
+        elif name == 'render':
+            results[name] = bench_render(lines, frames)
+        elif name == 'terminal':
+            results[name] = bench_terminal(lines, frames)
+        elif name == 'replay':
+            results[name] = bench_replay(lines)
+        print(f'{name:10} {results[name]["seconds"]:8.3f}s  ' +
+              ', '.join(f'{key}={value:,.1f}' if isinstance(value, float) else f'{key}={value:,}'
+                        for key, value in results[name].items() if key != 'seconds'))
+    return results
+
+
+def compare(results, previous):
+    print(f'Compared with {previous["meta"]["timestamp"]}:')
+    for name, result in results.items():
+        if name in previous['results']:
+            ratio = previous['results'][name]['seconds'] / result['seconds']
+            print(f'  {name:10} {ratio:6.2f}x {"faster" if ratio >= 1 else "slower"}')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the benchmarks on a synthetic Player.log")
+    add_arguments(parser)
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, default=BENCHMARKS)
+    parser.add_argument("--frames", type=int, default=50, help="frames to render in the render and terminal benchmarks")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON file of a previous run to compare with")
+    args = parser.parse_args()
+
+    params = generator_params(args)
+    log_lines = list(generate(**params))
+    print(f'{len(log_lines)} lines generated')
+    run_results = run_benchmarks(args.benchmarks, log_lines, args.frames)
+
+    report = {
+        'meta': {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0],
+                 'platform': platform.platform(), 'generator': params, 'lines': len(log_lines)},
+        'results': run_results,
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    if args.compare:
+        with open(args.compare, "r") as compare_file:
+            compare(run_results, json.load(compare_file))
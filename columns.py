@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+from array import array
+
+from logparser import classify
+from state import State, Arrival
+
+COLUMNS = ('seq', 'contract', 'train', 'location', 'delay')
+TABLES = ('contracts', 'trains', 'locations')
+
+
+class StopColumns:
+    """Every stop of a history as columns, for statistics over arrays instead of Train objects.
+
+    seq is the number of the history line (the log has no timestamps), contract, train and location index into the
+    name tables. Every run of a train gets its own train index, as train ids are reused by the next run of a contract.
+    """
+    def __init__(self):
+        self.seq = array('Q')
+        self.contract = array('I')
+        self.train = array('I')
+        self.location = array('I')
+        self.delay = array('f')
+        self.contracts = []
+        self.trains = []
+        self.locations = []
+        self._contract_index = {}
+        self._location_index = {}
+        self._runs = {}  # train id -> (Train of the current run, train index)
+
+    def __len__(self):
+        return len(self.seq)
+
+    @staticmethod
+    def _intern(index, table, name):
+        idx = index.get(name)
+        if idx is None:
+            idx = index[name] = len(table)
+            table.append(name)
+        return idx
+
+    def _train_index(self, train):
+        run = self._runs.get(train.tid)
+        if run is None or run[0] is not train:
+            run = self._runs[train.tid] = (train, len(self.trains))
+            self.trains.append(train.tid)
+        return run[1]
+
+    def append(self, seq, arrival, location, delay):
+        self.seq.append(seq)
+        self.contract.append(self._intern(self._contract_index, self.contracts, arrival.contract_id))
+        self.train.append(self._train_index(arrival.train))
+        self.location.append(self._intern(self._location_index, self.locations, location))
+        self.delay.append(delay)
+
+    def as_arrays(self) -> dict:
+        """The columns as numpy arrays sharing their memory (no appends while they are alive), and the name tables."""
+        import numpy as np
+        arrays = {name: np.frombuffer(getattr(self, name), dtype=getattr(self, name).typecode)
+                  for name in COLUMNS}
+        arrays.update({name: np.array(getattr(self, name), dtype=str) for name in TABLES})
+        return arrays
+
+    def save(self, path):
+        """Writes an uncompressed .npz, which np.load reads without copying through Python objects."""
+        import numpy as np
+        np.savez(path, **self.as_arrays())
+
+
+def from_history(file, state=None) -> StopColumns:
+    """Replays a history file (an iterable of lines) and records the stops applied to the state."""
+    if state is None:
+        state = State()
+    columns = StopColumns()
+    for seq, line in enumerate(file):
+        event = classify(line)
+        arrival = state.process_event(event)
+        if isinstance(arrival, Arrival):
+            columns.append(seq, arrival, event.location, event.delay)
+    return columns
+
+
+def load(path) -> dict:
+    import numpy as np
+    with np.load(path) as data:
+        return {name: data[name] for name in COLUMNS + TABLES}
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 3:
+        print("Usage: python columns.py <history file> <output.npz>")
+        sys.exit(1)
+
+    with open(sys.argv[1], "r") as history_file:
+        stop_columns = from_history(history_file)
+    stop_columns.save(sys.argv[2])
+    print(f'{len(stop_columns)} stops of {len(stop_columns.trains)} train runs, {len(stop_columns.contracts)} contracts, '
+          f'{len(stop_columns.locations)} locations')
@@ -1,29 +1,172 @@
+import sys
+import time
 import logging
 
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+
+from sortedindex import SortedIndex
 from train import Train
 
+DELAY_FLAGS = "_?!"
+EARLY_FLAGS = "_+*"
+
+# Completed trains kept per contract: the last max_trains and/or those born within max_age seconds, None for no limit.
+Retention = namedtuple("Retention", ["max_trains", "max_age"])
+
+# upper bounds of the histogram buckets in StopAggregate, the last bucket holds everything above
+HISTOGRAM_EDGES = (-120, -60, 0, 60, 120, 300)
+
+
+class StopAggregate:
+    """Delays at one station of the trains that were evicted from completed_trains."""
+    __slots__ = ('count', 'total', 'max_delay', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max_delay = None
+        self.histogram = array('I', [0] * (len(HISTOGRAM_EDGES) + 1))
+
+    def add(self, delay):
+        self.count += 1
+        self.total += delay
+        if self.max_delay is None or delay > self.max_delay:
+            self.max_delay = delay
+        self.histogram[bisect_left(HISTOGRAM_EDGES, delay)] += 1
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def delayed(self):
+        """Stops delayed by more than 60 seconds."""
+        return sum(self.histogram[HISTOGRAM_EDGES.index(60) + 1:])
+
+    def early(self):
+        """Stops 60 or more seconds early."""
+        return sum(self.histogram[:HISTOGRAM_EDGES.index(-60) + 1])
+
+
+def _by_time_of_birth(entry):
+    return entry[0].time_of_birth()
+
 
 class Contract:
-    def __init__(self, contract_id, contract_type, window):
+    def __init__(self, contract_id, contract_type, window=None, retention=None):
         self.cid = contract_id
         self.ctype = contract_type
         self.route = []
         self.line_leaders = []
         self.trains = {}
         self.completed_trains = {}
+        # (delay level, early level) per completed train, and how many completed trains are at each level
+        self._completed_levels = {}
+        self._level_counts = ([0] * len(DELAY_FLAGS), [0] * len(EARLY_FLAGS))
+        # worst (delay level, early level) of the trains evicted by the retention policy, they keep counting
+        self._evicted_levels = (0, 0)
+        self._routes = {}  # location sequence fingerprint -> ids of the active trains with that sequence
         self.route_complete = False
         self.w = window
+        self.retention = retention
+        self.evicted = {}  # station -> StopAggregate of the trains evicted by the retention policy
+        self.evicted_trains = 0
+        # (route, title column, columns of the completed trains by time of birth) for make_detail_view
+        self._detail = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_detail'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # fingerprints are only valid within one process
+        self._routes = {}
+        for train in self.trains.values():
+            self._index_train(train)
+
+    def _index_train(self, train):
+        self._routes.setdefault(train.fingerprint(), set()).add(train.tid)
+
+    def _unindex_train(self, tid, fingerprint):
+        tids = self._routes[fingerprint]
+        tids.discard(tid)
+        if not tids:
+            del self._routes[fingerprint]
 
     def add_train(self, train):
         self.trains[train.tid] = train
+        self._index_train(train)
 
     def del_train(self, tid):
         t = self.trains[tid]
-        logging.debug(f"Removing train {tid}")
+        logging.debug("Removing train %s", tid)
+        # completed_trains stays in order of completion, the oldest are evicted first
+        previous_run = self.completed_trains.pop(tid, None)
+        if previous_run is not None and self.retention is not None:
+            # the previous run of a reused train id is summarised like an evicted train
+            self._fold_train(previous_run)
         self.completed_trains[tid] = self.trains[tid]
         del self.trains[tid]
+        self._unindex_train(tid, t.fingerprint())
+        self._set_completed_levels(tid, t.delay_levels())
+        if self._detail is not None and self._detail[0] == self.route:
+            self._detail[2][tid] = (t, self.make_train_detail(t))
+        if self.retention is not None:
+            self.evict_trains()
         return t
 
+    def _set_completed_levels(self, tid, levels=None):
+        """Replaces the levels of a completed train id, or drops them if levels is None."""
+        delay_counts, early_counts = self._level_counts
+        previous = self._completed_levels.pop(tid, None)
+        if previous is not None:
+            delay_counts[previous[0]] -= 1
+            early_counts[previous[1]] -= 1
+        if levels is not None:
+            self._completed_levels[tid] = levels
+            delay_counts[levels[0]] += 1
+            early_counts[levels[1]] += 1
+
+    def evict_trains(self, now=None) -> int:
+        """Folds the completed trains beyond the retention policy into the per-station aggregates; returns how many."""
+        max_trains, max_age = self.retention
+        oldest_birth = None
+        if max_age is not None:
+            oldest_birth = (time.time_ns() if now is None else now) - int(max_age * 1e9)
+        evicted = 0
+        while self.completed_trains:
+            tid, train = next(iter(self.completed_trains.items()))
+            if not ((max_trains is not None and len(self.completed_trains) > max_trains)
+                    or (oldest_birth is not None and train.time_of_birth() < oldest_birth)):
+                break
+            del self.completed_trains[tid]
+            self._set_completed_levels(tid)
+            if self._detail is not None:
+                self._detail[2].pop(tid)
+            self._fold_train(train)
+            delay, early = train.delay_levels()
+            self._evicted_levels = (max(self._evicted_levels[0], delay), max(self._evicted_levels[1], early))
+            evicted += 1
+        return evicted
+
+    def _fold_train(self, train):
+        for stop in train.stops():
+            if stop.location not in self.evicted:
+                self.evicted[stop.location] = StopAggregate()
+            self.evicted[stop.location].add(stop.delay)
+        self.evicted_trains += 1
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by the trains and aggregates of this contract."""
+        size = sys.getsizeof(self.trains) + sys.getsizeof(self.completed_trains)
+        for train in list(self.trains.values()) + list(self.completed_trains.values()):
+            size += train.memory_usage()
+        for aggregate in self.evicted.values():
+            size += sys.getsizeof(aggregate) + sys.getsizeof(aggregate.histogram)
+        return size
+
     def length_of_route(self):
         return len(self.route)
 
@@ -46,10 +189,14 @@ class Contract:
     def make_train_detail(self, train) -> list:
         elems = [None] * (len(self.route) + 1)
         elems[0] = (f'{train.tid:>8}', 0)
-        logging.info(f'{train.tid}:{train.stops()}')
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug('%s:%s', train.tid, train.stops())
+        if train.first_location() not in self.route:
+            # the route changed since this train ran, its stops cannot be placed
+            return elems
         start_of_route = self.route.index(train.first_location())
         # the +1 is for the title
-        for idx, stop in enumerate(train.stops(), start=start_of_route + 1):
+        for idx, stop in enumerate(train.stops()[:len(self.route) - start_of_route], start=start_of_route + 1):
             delay = stop.delay
             color_pair = 0
             if delay >= 120:
@@ -59,123 +206,133 @@ class Contract:
             elems[idx] = (f'{stop.delay:>8.0f}', color_pair)
         return elems
 
+    def make_evicted_detail(self) -> list:
+        """Column with the mean delay per station of the evicted trains."""
+        elems = [(f'{self.evicted_trains:>4} old', 0)]
+        for location in self.route:
+            aggregate = self.evicted.get(location)
+            if aggregate is None:
+                elems.append(None)
+                continue
+            mean = aggregate.mean()
+            color_pair = 0
+            if mean >= 120:
+                color_pair = 2
+            elif mean >= 60:
+                color_pair = 1
+            elems.append((f'{mean:>8.0f}', color_pair))
+        return elems
+
     def make_detail_view(self):
-        rows = []
-        title = "Station"
-        title_row = [(f'{title:14}', 0)]
-        title_row.extend([(f'{location[0:14]:14}', 0) for location in self.route])
-        rows.append(title_row)
-        for train in sorted(self.completed_trains.values(), key=lambda t: t.time_of_birth()):
-            if train.tid not in self.trains:
-                rows.append(self.make_train_detail(train))
+        """Returns the title and the columns of the detail view: the stations, then one column per train."""
+        # The columns of completed trains only change with the route; they are kept and extended by del_train.
+        if self._detail is None or self._detail[0] != self.route:
+            title = "Station"
+            title_column = [(f'{title:14}', 0)]
+            title_column.extend([(f'{location[0:14]:14}', 0) for location in self.route])
+            completed = SortedIndex(key=_by_time_of_birth)
+            for tid, train in self.completed_trains.items():
+                completed[tid] = (train, self.make_train_detail(train))
+            self._detail = (list(self.route), title_column, completed)
+        _, title_column, completed = self._detail
+        columns = [title_column]
+        if self.evicted_trains:
+            columns.append(self.make_evicted_detail())
+        columns.extend(column for tid, (_, column) in completed.items() if tid not in self.trains)
         for train in sorted(self.trains.values(), key=lambda t: t.time_of_birth()):
-            rows.append(self.make_train_detail(train))
-        return f'Detail for contract {self.cid}', list(map(list, zip(*rows)))
-
-    def check_for_complete_route(self, length) -> bool:
-        handled_routes = {}
-        logging.debug(f"Checking route completion: {len(self.trains)} trains: {[train.tid for train in self.trains.values()]}")
-        for train_id, train in self.trains.items():
-            logging.debug(f"  {train_id}: {train.locations()}")
-            tuple_list = tuple(train.locations())
-            if len(tuple_list) < length:
-                logging.debug(f"Discarding {train_id}, since {len(tuple_list)} < {length}")
-                continue
-            if tuple_list in handled_routes:
-                logging.debug(f"Leaders: {train_id} and {handled_routes[tuple_list]}")
-                self.route = train.locations()
-                self.line_leaders = [train_id, handled_routes[tuple_list]]
-                logging.debug(f"Closing route {self.cid}: {self.route}")
-                logging.info(f"Closing route {self.cid} \
-                                with lead train {self.line_leaders}: {self.route}")
-                self.route_complete = True
-                for _, train_2 in self.trains.items():
-                    train_2.finalize(self.end_of_route())
-                return True
-            else:
-                logging.debug("Incomplete route")
-                handled_routes[tuple_list] = train_id
-        return False
+            columns.append(self.make_train_detail(train))
+        return f'Detail for contract {self.cid} ({self.memory_usage() / 1024:.0f} KiB)', columns
+
+    def check_for_complete_route(self, tid) -> bool:
+        # The route is complete once two active trains have covered the whole route in the same way. This is checked
+        # on every arrival, so only the train that just arrived can form such a pair.
+        train = self.trains[tid]
+        if train.num_locations() < self.length_of_route():
+            return False
+        partners = [other for other in self._routes[train.fingerprint()]
+                    if other != tid and self.trains[other].location_ids() == train.location_ids()]
+        if not partners:
+            logging.debug("Incomplete route")
+            return False
+
+        # the train added later leads, as when scanning the trains in order
+        first, second = [train_id for train_id in self.trains if train_id in (tid, partners[0])]
+        logging.debug("Leaders: %s and %s", second, first)
+        self.route = list(self.trains[second].locations())
+        self.line_leaders = [second, first]
+        logging.info("Closing route %s with lead train %s: %s", self.cid, self.line_leaders, self.route)
+        self.route_complete = True
+        for _, train_2 in self.trains.items():
+            train_2.finalize(self.end_of_route())
+        return True
 
     def update_route(self, tid) -> bool:
-        longest_route_length = self.length_of_route()
         logging.debug("---- route update ----")
-        logging.debug(f"Processing route update for {tid}:")
-        logging.debug(f"  Current contract route: {len(self.route)}:{self.route}")
-        longest_route_id = None
-        for train_id, train in self.trains.items():
-            if train.num_locations() > longest_route_length:
-                longest_route_length = train.num_locations()
-                longest_route_id = train.tid
-
-        if longest_route_length > self.length_of_route():
+        logging.debug("Processing route update for %s:", tid)
+        logging.debug("  Current contract route: %d:%s", len(self.route), self.route)
+        # the route is at least as long as every train after each update, so only this train can be longer
+        train = self.trains[tid]
+        if train.num_locations() > self.length_of_route():
             if self.route_complete:
-                logging.debug(f"  Reopening route {self.cid}, previously: {self.route}, new: {self.trains[longest_route_id].locations()}")
+                logging.debug("  Reopening route %s, previously: %s, new: %s", self.cid, self.route, train.locations())
             self.route_complete = False
-            self.route = self.trains[longest_route_id].locations()
-            logging.debug(f"  New route: {self.cid}: {str(self.route)}")
-            for train_id, train in self.trains.items():
-                train.done = False
+            self.route = list(train.locations())
+            logging.debug("  New route: %s: %s", self.cid, self.route)
+            for train_id, other in self.trains.items():
+                other.done = False
         if not self.route_complete:
-            return self.check_for_complete_route(longest_route_length)
+            return self.check_for_complete_route(tid)
         return False
 
     def repair_line_leader(self, train):
-        logging.debug("Checking for route extension for {self.cid}")
+        logging.debug("Checking for route extension for %s", self.cid)
         if train.tid in self.line_leaders and train.current_location() not in self.route:
-            logging.debug(f"New station {train.current_location()} found for line leader, adding to existing route {self.route}")
+            logging.debug("New station %s found for line leader, adding to existing route %s",
+                          train.current_location(), self.route)
             new_location, new_delay = train.current_location(), train.current_delay()
             self.line_leaders = [train.tid, train.tid]
             train.set_route(self.route)
             train.new_location(new_location, new_delay)
-            logging.debug(f"New route for train: {train.locations()}")
+            logging.debug("New route for train: %s", train.locations())
 
     def new_location_for_train(self, tid, location, delay) -> bool:
-        logging.debug(f"==== Arrival for contract {self.cid} ====")
+        logging.debug("==== Arrival for contract %s ====", self.cid)
+        previous_fingerprint = None
         if tid not in self.trains:
             self.trains[tid] = Train(tid, location, delay)
-            logging.debug(f"New train: {tid} at {location}")
+            logging.debug("New train: %s at %s", tid, location)
             if self.route_complete:
                 self.repair_line_leader(self.trains[tid])
                 if self.length_of_route() == 1:
                     self.trains[tid].finalize(self.end_of_route())
         else:
+            previous_fingerprint = self.trains[tid].fingerprint()
             self.trains[tid].new_location(location, delay)
-            logging.debug(f"{location} for {tid}, train route {self.trains[tid].locations()}")
+            logging.debug("%s for %s, train route %s", location, tid, self.trains[tid].locations())
             if self.route_complete:
                 self.trains[tid].finalize(self.end_of_route())
+        if previous_fingerprint is not None:
+            self._unindex_train(tid, previous_fingerprint)
+        self._index_train(self.trains[tid])
         closed_route = self.update_route(tid)
 
         return closed_route
 
     def purge_trains(self) -> list:
         trains_to_delete = [tid for tid, t in self.trains.items() if t.done]
-        logging.debug(f"Trains to remove: {trains_to_delete}")
+        logging.debug("Trains to remove: %s", trains_to_delete)
         return [self.del_train(tid) for tid in trains_to_delete]
 
     def get_delay_info(self) -> str:
-        delay_info = list("_" * 4)
-        for tid, t in self.completed_trains.items():
-            for stop in t.stops():
-                if stop.delay > 120:
-                    delay_info[0] = "!"
-                elif stop.delay > 60:
-                    delay_info[0] = "?"
-                elif stop.delay < -120:
-                    delay_info[1] = '*'
-                elif stop.delay < -60:
-                    delay_info[1] = '+'
-        for tid, t in self.trains.items():
-            for stop in t.stops():
-                if stop.delay > 120:
-                    delay_info[2] = "!"
-                elif stop.delay > 60:
-                    delay_info[2] = "?"
-                elif stop.delay < -120:
-                    delay_info[3] = '*'
-                elif stop.delay < -60:
-                    delay_info[3] = '+'
-        return ''.join(delay_info)
+        completed_delay, completed_early = (max([level for level, count in enumerate(counts) if count] + [evicted])
+                                            for counts, evicted in zip(self._level_counts, self._evicted_levels))
+        current_delay, current_early = 0, 0
+        for t in self.trains.values():
+            delay, early = t.delay_levels()
+            current_delay = max(current_delay, delay)
+            current_early = max(current_early, early)
+        return (DELAY_FLAGS[completed_delay] + EARLY_FLAGS[completed_early]
+                + DELAY_FLAGS[current_delay] + EARLY_FLAGS[current_early])
 
     def print_info(self) -> str:
         return f'{"*" if not self.route_complete else " "}{self.get_delay_info()}{self.cid:>5}: {self.start_of_route()}--{len(self.route)}-->{self.end_of_route()}'
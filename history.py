@@ -0,0 +1,57 @@
+import os
+import time
+
+from logparser import classify
+
+
+class HistoryWriter:
+    """Appends Player.log lines to the history file in batches.
+
+    Every batch is written together with the last_read_position marker for the lines it contains in a single write,
+    so the history never holds lines that are not covered by the marker following them.
+    """
+    def __init__(self, path, max_buffer=1 << 18, max_delay=5.0, recognised_only=False, clock=time.monotonic):
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._max_buffer = max_buffer
+        self._max_delay = max_delay
+        self._recognised_only = recognised_only
+        self._clock = clock
+        self._buffer = []
+        self._buffered = 0
+        self._last_flush = clock()
+        self.flushes = 0
+
+    def append(self, line):
+        if self._recognised_only and classify(line) is None:
+            return
+        self._buffer.append(line)
+        self._buffered += len(line)
+
+    def maybe_flush(self, position, file_number) -> bool:
+        if not self._buffer:
+            return False
+        if self._buffered < self._max_buffer and self._clock() - self._last_flush < self._max_delay:
+            return False
+        self.flush(position, file_number)
+        return True
+
+    def flush(self, position, file_number):
+        self._buffer.append(f'last_read_position: {position} of {file_number}\n')
+        data = ''.join(self._buffer).encode('utf-8')
+        while data:
+            written = os.write(self._fd, data)
+            data = data[written:]
+        os.fsync(self._fd)
+        self._buffer.clear()
+        self._buffered = 0
+        self._last_flush = self._clock()
+        self.flushes += 1
+
+    def offset(self):
+        return os.lseek(self._fd, 0, os.SEEK_END)
+
+    def file_number(self):
+        return os.fstat(self._fd).st_ino
+
+    def close(self):
+        os.close(self._fd)
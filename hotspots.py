@@ -0,0 +1,60 @@
+from sortedindex import SortedIndex
+
+
+class Hotspot:
+    """Running delay aggregate of one location or segment (name is the location or the pair of locations)."""
+    __slots__ = ('name', 'count', 'mean', 'max_delay', 'recent')
+    RECENT_WEIGHT = 0.2  # weight of the newest delay in the moving average
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.mean = 0.0
+        self.max_delay = None
+        self.recent = 0.0  # exponentially weighted moving average, follows the trend of the last arrivals
+
+    def add(self, delay):
+        self.count += 1
+        self.mean += (delay - self.mean) / self.count
+        if self.max_delay is None or delay > self.max_delay:
+            self.max_delay = delay
+        if self.count == 1:
+            self.recent = delay
+        else:
+            self.recent += self.RECENT_WEIGHT * (delay - self.recent)
+
+    def total(self):
+        return self.mean * self.count
+
+    def __repr__(self):
+        return f'Hotspot({self.name!r}, {self.count}, {self.mean:.1f}, {self.max_delay}, {self.recent:.1f})'
+
+
+def _by_total_delay(hotspot):
+    return -hotspot.total()
+
+
+class HotspotIndex:
+    """Hotspots ranked by the total delay they produced, updated per arrival without re-sorting."""
+    def __init__(self):
+        self._hotspots = SortedIndex(key=_by_total_delay)
+
+    def add(self, key, delay):
+        hotspot = self._hotspots[key] if key in self._hotspots else Hotspot(key)
+        hotspot.add(delay)
+        self._hotspots[key] = hotspot  # re-sorts just this hotspot
+        return hotspot
+
+    def get(self, key):
+        return self._hotspots[key] if key in self._hotspots else None
+
+    def top(self, num):
+        hotspots = []
+        for hotspot in self._hotspots.values():
+            if len(hotspots) == num:
+                break
+            hotspots.append(hotspot)
+        return hotspots
+
+    def __len__(self):
+        return len(self._hotspots)
@@ -0,0 +1,241 @@
+import os
+import time
+import queue
+import logging
+import threading
+
+from collections import namedtuple
+
+from logparser import BadPlatformEvent, classify
+from snapshot import snapshot_path, save_snapshot
+from state import Arrival
+from tailer import Tailer
+
+SNAPSHOT_INTERVAL = 300  # seconds
+
+# What the lines applied since the last change set changed: pad ids to redraw and status messages.
+ChangeSet = namedtuple("ChangeSet", ["dirty", "statuses", "lines"])
+
+
+class Ingester:
+    """Tails Player.log, appends it to the history and applies it to the state in a thread of its own.
+
+    The state is shared, not copied: this thread is its only writer and changes it only while holding lock, the user
+    interface takes the lock to read it and receives ChangeSets from changes, the wakeup file descriptor becomes
+    readable when there are new ones. Lines are applied in batches of at most MAX_BATCH_SECONDS, so the lock is never
+    held for long, however far the log is ahead. Work that only reads the state here (snapshots, the state server)
+    runs without the lock.
+    """
+    MAX_BATCH_SECONDS = 0.02
+    BATCH_CHECK = 64  # lines between two looks at the clock
+
+    def __init__(self, tailer, state, notifier, perf, profiler, history=None, history_path="", max_queue=64,
+                 publisher=None, clock=time.monotonic):
+        self.tailer = tailer
+        self.state = state
+        self.notifier = notifier
+        self.perf = perf
+        self.profiler = profiler
+        self.history = history
+        self.history_path = history_path
+        self.publisher = publisher  # StatePublisher of the state server, if any
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.changes = queue.Queue(maxsize=max_queue)
+        self.wakeup, self._wakeup_w = os.pipe()
+        os.set_blocking(self.wakeup, False)
+        os.set_blocking(self._wakeup_w, False)
+        self.error = None
+        self._failed_position = None  # offset behind the last line applied before applying a line failed
+        self._dirty = set()
+        self._statuses = []
+        self._lines = 0
+        self._profile_request = None
+        self._last_snapshot = clock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="ingest", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def close(self):
+        """Writes the last snapshot and closes the files; call after stop()."""
+        if self.history is not None:
+            if self._failed_position is None:
+                write_snapshot(self.state, self.history, self.history_path, self.tailer.position,
+                               self.tailer.file_number)
+            else:
+                # the state may be half way through the failing line: only the lines applied before it are marked as
+                # read, so the next start reads the rest again, and the last snapshot stays the last consistent one
+                self.history.flush(self._failed_position, self.tailer.file_number)
+            self.history.close()
+        self.tailer.close()
+        os.close(self.wakeup)
+        os.close(self._wakeup_w)
+
+    def mark_dirty(self, *pad_ids):
+        self._dirty.update(pad_ids)
+
+    def update_status(self, message):
+        self._statuses.append(message)
+
+    def request_profile(self, duration):
+        # cProfile only sees the thread that enables it, so the profile is started from the ingestion thread
+        self._profile_request = duration
+
+    def drain(self) -> list:
+        """The change sets published since the last call (user interface thread)."""
+        try:
+            while os.read(self.wakeup, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        change_sets = []
+        while True:
+            try:
+                change_sets.append(self.changes.get_nowait())
+            except queue.Empty:
+                return change_sets
+
+    def _publish(self):
+        if not self._dirty and not self._statuses:
+            return
+        try:
+            self.changes.put_nowait(ChangeSet(frozenset(self._dirty), tuple(self._statuses), self._lines))
+        except queue.Full:
+            return  # the user interface is behind, keep collecting into the next change set
+        self._dirty, self._statuses, self._lines = set(), [], 0
+        try:
+            os.write(self._wakeup_w, b'.')
+        except BlockingIOError:
+            pass  # the pipe is full of wakeups already
+
+    def _run(self):
+        try:
+            while not self._stop.is_set():
+                self.step()
+                self.maybe_write_snapshot()
+        except Exception as e:
+            logging.exception('Ingestion failed')
+            self.error = e
+            self.update_status(f'Ingestion failed: {e!r}')
+            self._publish()
+        finally:
+            if self.profiler.is_running():
+                self.profiler.stop()
+
+    def maybe_write_snapshot(self):
+        """Every SNAPSHOT_INTERVAL seconds, evicts the trains past the retention age and writes a snapshot.
+
+        The snapshot is written without the lock: this thread is the only writer of the state, and the user interface
+        only reads it, so pickling and syncing the snapshot to disk pause the ingestion but never the screen or the
+        keyboard.
+        """
+        if self.clock() - self._last_snapshot <= SNAPSHOT_INTERVAL:
+            return
+        # contracts without arrivals would keep their expired trains otherwise
+        with self.lock:
+            evicted = self.state.evict_trains()
+        if evicted:
+            self.mark_dirty('active_contract', 'inactive_contract')
+            if self.publisher is not None:
+                for contract_id in evicted:
+                    self.publisher.touch(contract_id)
+            self._publish()
+        if self.history is not None:
+            write_snapshot(self.state, self.history, self.history_path, self.tailer.position,
+                           self.tailer.file_number)
+        self._last_snapshot = self.clock()
+
+    def step(self):
+        """Reads what is available and applies it, or waits for the log to grow."""
+        lines = self.tailer.read_lines()
+        idx = applied = 0
+        while idx < len(lines):
+            deadline = self.clock() + self.MAX_BATCH_SECONDS
+            with self.lock:
+                while True:
+                    num_applied = idx
+                    try:
+                        for line in lines[idx:idx + self.BATCH_CHECK]:
+                            event = process_log_line(self.state, line, self, self.notifier, self.perf)
+                            num_applied += 1
+                            if self.history is not None:
+                                self.history.append(line)
+                            if self.publisher is not None and isinstance(event, Arrival):
+                                self.publisher.touch(event.contract_id)
+                    except Exception:
+                        self._failed_position = self.tailer.position_after(num_applied)
+                        raise
+                    idx += self.BATCH_CHECK
+                    if idx >= len(lines) or self.clock() >= deadline:
+                        break
+            self._lines += min(idx, len(lines)) - applied
+            applied = min(idx, len(lines))
+            self._publish()
+        if self.publisher is not None and self.publisher.is_due():
+            self.publisher.publish(self.state)
+        self.perf.add_lines(len(lines))
+        self.perf.backlog_bytes = self.tailer.backlog()
+        if self.history is not None:
+            self.history.maybe_flush(self.tailer.position, self.tailer.file_number)
+
+        if self._profile_request is not None:
+            if not self.profiler.is_running():
+                self.profiler.start(self._profile_request)
+                self.update_status(f'Profiling for {self._profile_request}s')
+            self._profile_request = None
+        written = self.profiler.check()
+        if written:
+            self.update_status(f'Wrote {written[0]}')
+
+        if not lines:
+            rotated = self.tailer.check_rotation()
+            if rotated:
+                self.update_status(rotated)
+            else:
+                self.tailer.wait(Tailer.MAX_POLL)
+        self._publish()
+
+
+def write_snapshot(state, history_file, history_path, position, file_number):
+    history_file.flush(position, file_number)
+    state.start_pos, state.last_file_number = position, file_number
+    try:
+        save_snapshot(snapshot_path(history_path), state, history_file.offset(), history_file.file_number())
+    except OSError as e:
+        logging.warning('Could not write snapshot: %r', e)
+
+
+def process_log_line(state, line, changes, notifier, perf):
+    """Applies a line to the state and returns its event; changes collects the pads to redraw (mark_dirty) and
+    status messages."""
+    start = perf.start()
+    event = classify(line)
+    perf.stop('parse', start)
+    start = perf.start()
+    event = state.process_event(event)
+    perf.stop('state', start)
+    if isinstance(event, Arrival):
+        train = event.train
+        if event.closed_route:
+            changes.update_status(f'Closed route {event.contract_id}')
+
+        if train.current_delay() > 120:
+            notifier.notify(event.contract_id, f'{train.tid} delayed',
+                            f'{train.tid} delayed at {train.current_location():16} by {train.current_delay()}')
+
+        dirty = ['delay', 'early', 'active_contract', 'inactive_contract', 'hotspots']
+        if train.current_delay() > 60:
+            dirty.append('recent')
+        if event.purged:
+            dirty.append('removed')
+        changes.mark_dirty(*dirty)
+    elif isinstance(event, BadPlatformEvent):
+        changes.update_status(f"{event.tid}: Bad platform!")
+    return event
@@ -0,0 +1,57 @@
+import re
+
+from collections import namedtuple
+from functools import lru_cache
+
+DelayEvent = namedtuple("DelayEvent", ["train_id", "location", "delay"])
+BadPlatformEvent = namedtuple("BadPlatformEvent", ["tid"])
+MarkerEvent = namedtuple("MarkerEvent", ["position", "file_number"])
+
+_DELAY_PATTERN = re.compile(r'Delay for train (.+?)\[(.+?)]: ([^$]+)')
+_BAD_PLATFORM_PATTERN = re.compile(r'Bad platform for train (.+)')
+_MARKER_PATTERN = re.compile(r'last_read_position: (\d+) of (\d+)')
+_CONTRACT_PATTERN = re.compile(r'([A-Za-z]+)(\d{3})')
+
+
+def classify(line):
+    """Returns a DelayEvent, BadPlatformEvent or MarkerEvent for the line, or None for any other line."""
+    # Most lines are Unity noise, the literal checks reject those before any regex runs.
+    if 'Delay for train' in line:
+        match = _DELAY_PATTERN.search(line)
+        if match:
+            return DelayEvent(match.group(1), match.group(2), parse_delay(match.group(3)))
+    if 'Bad platform for train' in line:
+        match = _BAD_PLATFORM_PATTERN.search(line)
+        if match:
+            return BadPlatformEvent(match.group(1))
+    if 'last_read_position: ' in line:
+        match = _MARKER_PATTERN.search(line)
+        if match:
+            return MarkerEvent(int(match.group(1)), int(match.group(2)))
+    return None
+
+
+def parse_delay(delay_str):
+    delay_str = delay_str.strip()
+    multiplier = 1
+    try:
+        if delay_str[0] == '-':
+            multiplier = -1
+            delay_str = delay_str[1:]
+        delay = int(delay_str[0:2]) * 3600 + int(delay_str[3:5]) * 60 + int(delay_str[6:8])
+        return float(delay) * multiplier
+    except (ValueError, IndexError):
+        return 0
+
+
+@lru_cache(maxsize=4096)
+def get_contract_id(train_id):
+    match = _CONTRACT_PATTERN.search(train_id)
+    if match:
+        if match.group(1) == 'Reg':
+            return match.group(1), match.group(2) + train_id[6]
+        else:
+            return match.group(1), match.group(2)
+
+    raise ValueError
+
@@ -0,0 +1,27 @@
+import queue
+import logging
+import logging.handlers
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+
+
+def setup_logging(path='app.log', level=logging.INFO, max_bytes=10 << 20, backup_count=3):
+    """Routes the root logger through a queue to a rotating log file written by a background thread.
+
+    Returns the started QueueListener; stop() it on exit to write the remaining records.
+    """
+    if isinstance(level, str):
+        level = getattr(logging, level.upper())
+    records = queue.SimpleQueue()
+    file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    listener = logging.handlers.QueueListener(records, file_handler)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(records))
+    root.setLevel(level)
+    listener.start()
+    return listener
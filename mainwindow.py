@@ -36,36 +36,84 @@ class Popup(ABC):
 
 
 class DetailedPopup(Popup):
+    """Table of columns; only the cells in the viewport are drawn. The first row and column stay in place."""
+    CELL_WIDTH = 14
+
+    def __init__(self, title, columns):
+        self.columns = columns
+        self.num_rows = len(columns[0])
+        self.top = 1  # first scrolled row and column
+        self.left = 1
+        super().__init__(title, columns)
+
     def draw(self, title, message):
-        cell_width = 14
         # Calculate the size and position of the window
-        self.rows = min(len(message) + 8, curses.LINES)
-        self.cols = min(len(message[0]) * cell_width + 6, curses.COLS)
+        self.rows = min(self.num_rows + 8, curses.LINES)
+        self.cols = min(len(self.columns) * self.CELL_WIDTH + 6, curses.COLS)
         self.row, self.col = (curses.LINES - self.rows) // 2, (curses.COLS - self.cols) // 2
 
         self.popup = curses.newwin(self.rows, self.cols, self.row, self.col)
-        self.popup.box()  # Draw a box around the edges
+        self.draw_viewport()
+
+    def visible_rows(self):
+        return max(self.rows - 7, 1)
+
+    def visible_columns(self):
+        return max((self.cols - 6) // self.CELL_WIDTH - 1, 1)
 
+    def _cell(self, pos, column, row):
+        cell_info = self.columns[column][row]
+        if cell_info is not None:
+            (text, color_pair_index) = cell_info
+            self.popup.addstr(3 + pos[0], 3 + pos[1] * self.CELL_WIDTH, text, curses.color_pair(color_pair_index))
+        elif row > 0 and self.columns[column][row - 1] is not None:  # ACS_DARROW A_BLINK
+            marker = '*'
+            self.popup.addstr(3 + pos[0], 3 + pos[1] * self.CELL_WIDTH, f'{marker:>8}')
+
+    def draw_viewport(self):
+        self.popup.erase()
+        self.popup.box()  # Draw a box around the edges
         # Add the title and message text
-        self.popup.addstr(0, 2, ' ' + title + ' ')
-
-        previous_line = None
-        for idx, line in enumerate(message, start=3):
-            for pos, cell_info in enumerate(line):
-                if cell_info is not None:
-                    (text, color_pair_index) = cell_info
-                    self.popup.addstr(idx, 3 + pos * cell_width, text, curses.color_pair(color_pair_index))
-                else:
-                    if previous_line is not None and previous_line[pos] is not None:  # ACS_DARROW A_BLINK
-                        marker = '*'
-                        self.popup.addstr(idx, 3 + pos * cell_width, f'{marker:>8}')
-
-            previous_line = line
+        self.popup.addstr(0, 2, ' ' + self.title + ' ')
+        last_row = min(self.top + self.visible_rows(), self.num_rows)
+        last_column = min(self.left + self.visible_columns(), len(self.columns))
+        rows = [0] + list(range(self.top, last_row))
+        columns = [0] + list(range(self.left, last_column))
+        for y, row in enumerate(rows):
+            for x, column in enumerate(columns):
+                self._cell((y, x), column, row)
+        if last_row < self.num_rows or last_column < len(self.columns) or self.top > 1 or self.left > 1:
+            position = f' rows {self.top}-{last_row - 1}/{self.num_rows - 1} trains {self.left}-{last_column - 1}/' \
+                       f'{len(self.columns) - 1} '
+            self.popup.addstr(self.rows - 1, 2, position[:self.cols - 4])
         self.popup.refresh()
 
+    def scroll(self, rows, columns):
+        top = max(1, min(self.top + rows, self.num_rows - self.visible_rows()))
+        left = max(1, min(self.left + columns, len(self.columns) - self.visible_columns()))
+        if (top, left) != (self.top, self.left):
+            self.top, self.left = top, left
+            self.draw_viewport()
+
     def handle_input(self, window, char) -> bool:
         if super().handle_input(window, char):
             return True
+        if char == curses.KEY_UP:
+            self.scroll(-1, 0)
+        elif char == curses.KEY_DOWN:
+            self.scroll(1, 0)
+        elif char == curses.KEY_LEFT:
+            self.scroll(0, -1)
+        elif char == curses.KEY_RIGHT:
+            self.scroll(0, 1)
+        elif char == curses.KEY_PPAGE:
+            self.scroll(0, -self.visible_columns())
+        elif char == curses.KEY_NPAGE:
+            self.scroll(0, self.visible_columns())
+        elif char == curses.KEY_HOME:
+            self.scroll(-self.num_rows, -len(self.columns))
+        elif char == curses.KEY_END:
+            self.scroll(0, len(self.columns))
         return False
 
 
@@ -118,12 +166,15 @@ class Window:
         self.debug_messages = deque(maxlen=self.PAD_SIZE)
         self.pads = {}
         self.popup = None
+        self.show_hud = False
         self.stdscr = stdscr
         self.max_y, self.max_x = stdscr.getmaxyx()
 
         Pad.set_size_params(self.max_y, self.max_x, self.NUM_ROWS, self.NUM_COLS)
 
         self.pads['status'] = Pad(self.PAD_SIZE, self.PAD_WIDTH, "Status", PadSize(11, 0, 2, 2))
+        self.pads['status'].set_source(self.status_messages)
+        self.pads['hud'] = Pad(self.PAD_SIZE, self.PAD_WIDTH, "Performance", PadSize(11, 0, 2, 2))
 
         self.pads['delay'] = Pad(self.PAD_SIZE, self.PAD_WIDTH, "Train Delays (by delay)", PadSize(0, 0, 4, 1))
         self.pads['removed'] = Pad(self.PAD_SIZE, self.PAD_WIDTH, "Recently finished trains:", PadSize(4, 0, 3, 1))
@@ -133,12 +184,14 @@ class Window:
         self.pads['active_contract'] = Pad(self.PAD_SIZE, self.PAD_WIDTH,
                                            "Active trains for contract and last seen location:", PadSize(0, 1, 7, 1))
         self.pads['inactive_contract'] = Pad(self.PAD_SIZE, self.PAD_WIDTH, "Contracts without active trains",
-                                             PadSize(7, 1, 4, 1))
+                                             PadSize(7, 1, 2, 1))
+        self.pads['hotspots'] = Pad(self.PAD_SIZE, self.PAD_WIDTH,
+                                    "Delay hotspots: stations (delay) and segments (delay gained)", PadSize(9, 1, 2, 1))
 
         self.resize(stdscr)
 
     def resize(self, stdscr):
-        logging.info(f'Resizing to {stdscr.getmaxyx()}')
+        logging.info('Resizing to %s', stdscr.getmaxyx())
         new_y, new_x = stdscr.getmaxyx()
         if self.max_x != new_x or self.max_y != new_y:
             self.max_y, self.max_x = stdscr.getmaxyx()
@@ -148,11 +201,20 @@ class Window:
 
     def update_status(self, string):
         self.status_messages.appendleft(string)
-        self.pads['status'].prepare()
-        for idx, line in enumerate(list(self.status_messages)):
-            self.pads['status'].add_str(idx, 0, line)
-
-        self.pads['status'].update_draw()
+        self.pads['status'].update_pad()
+        if not self.show_hud:
+            self.pads['status'].draw()
+
+    def update_hud(self, lines):
+        self.pads['hud'].prepare()
+        for idx, line in enumerate(lines):
+            self.pads['hud'].add_str(idx, 0, line)
+        self.pads['hud'].update_pad()
+
+    def toggle_hud(self):
+        # the performance HUD takes the place of the status pad
+        self.show_hud = not self.show_hud
+        self.redraw_pads()
 
     @staticmethod
     def _add_train_str(pad, pos, delay, tid, location):
@@ -187,9 +249,33 @@ class Window:
 
         pad.update_pad()
 
-    def redraw_pads(self):
-        for _, pad in self.pads.items():
-            pad.draw()
+    @staticmethod
+    def _hotspot_str(hotspot):
+        name = hotspot.name if isinstance(hotspot.name, str) else '>'.join(hotspot.name)
+        return f'{name[:14]:14} {hotspot.count:5} {hotspot.mean:5.0f} {hotspot.max_delay:5.0f} {hotspot.recent:5.0f}'
+
+    @classmethod
+    def update_hotspot_pad(cls, stations, segments, pad):
+        # only the visible rows are taken from the ranked indexes
+        num = pad.content_height() - 1
+        pad.prepare()
+        pad.add_str(0, 0, f'{"station":14} {"count":>5} {"mean":>5} {"max":>5} {"trend":>5} '
+                          f'{"segment":14} {"count":>5} {"mean":>5} {"max":>5} {"trend":>5}')
+        for idx, hotspot in enumerate(stations.top(num), start=1):
+            pad.add_str(idx, 0, cls._hotspot_str(hotspot))
+        for idx, hotspot in enumerate(segments.top(num), start=1):
+            pad.add_str(idx, 39, cls._hotspot_str(hotspot))
+        pad.update_pad()
+
+    def redraw_pads(self, full=True):
+        """Draws all pads with a single terminal update; full repaints them, e.g. after a popup was closed."""
+        hidden = 'status' if self.show_hud else 'hud'
+        for pad_id, pad in self.pads.items():
+            if pad_id != hidden:
+                if full:
+                    pad.touch()
+                pad.draw(update=False)
+        curses.doupdate()
 
     def has_popup(self):
         return self.popup is not None
@@ -1,204 +1,152 @@
 #!/usr/bin/env python3
+import sys
 import time
-import re
 import curses
+import select
 import logging
 
-from datetime import timedelta
-from os import stat
-
-from contract import Contract
-from train import Train
-from uniquedeque import UniqueDeque
+from contract import Contract, Retention
+from history import HistoryWriter
+from replay import replay_file
+from scheduler import RenderScheduler
+from snapshot import snapshot_path, load_snapshot
+from state import State
+from ingest import Ingester
+from server import StatePublisher, serve
 from mainwindow import Window, DetailedPopup, OpenPopup
 from pad import Pad
-from plyer import notification
-
-
-def parse_log_line(line):
-    match = re.search(r'Delay for train (.+?)\[(.+?)]: ([^$]+)', line)
-    if match:
-        train_id = match.group(1)
-        location = match.group(2)
-        delay_str = match.group(3).strip()
-        multiplier = 1
-
-        try:
-            if delay_str[0] == '-':
-                multiplier = -1
-                delay_str = delay_str[1:]
-            delay = timedelta(hours=int(delay_str[0:2]), minutes=int(delay_str[3:5]),
-                              seconds=int(delay_str[6:8]))
-            delay_in_seconds = delay.total_seconds() * multiplier
-        except ValueError:
-            delay_in_seconds = 0
-
-        return train_id, location, delay_in_seconds
-    return None
-
-
-def parse_bad_platform(line):
-    match = re.search(r'Bad platform for train (.+)', line)
-    if match:
-        return match.group(1)
-
-    return None
-
+from notifier import Notifier
+from tailer import Tailer
+from perf import PerfCounters, Profiler
 
-def get_contract_id(train_id):
-    match = re.search(r'([A-Za-z]+)(\d{3})', train_id)
-    if match:
-        if match.group(1) == 'Reg':
-            return match.group(1), match.group(2) + train_id[6]
-        else:
-            return match.group(1), match.group(2)
-
-    raise ValueError
+HUD_INTERVAL = 1  # seconds
+PROFILE_DURATION = 30  # seconds
 
 
-def monitor_log(stdscr, filepath, history_path):
+def monitor_log(stdscr, filepath, history_path, fps=20, compact_history=False, profile=0, perf_dump="perf.json",
+                retention=None, serve_port=None):
     curses.curs_set(0)  # Hide the cursor
     if curses.has_colors():
         curses.start_color()
     stdscr.nodelay(True)  # Make getch non-blocking
 
-    current_file = open(filepath, "r")
+    tailer = Tailer(filepath)
     history_file = None
     if history_path != "":
         history_file = open(history_path, "r")
-    delays = {}
-    early = {}
-    contracts = {}
-    start_pos = 0
-    last_file_number = -1
-    current_file_number = stat(filepath).st_ino
-    recent_delays = UniqueDeque(max_length=12)
-    recent_lines = UniqueDeque(max_length=200)
-    removed_trains = UniqueDeque(max_length=200)
+    state = State(retention)
     w = Window(stdscr)
 
     w.redraw_pads()
     if history_file is not None:
         w.update_status(f"Reading {history_file}")
-        logging.info(f"Reading {history_file}")
+        logging.info('Reading %s', history_file)
         try:
-            while True:
-                line = history_file.readline()
-
-                if line:
-                    process_log_line(contracts, delays, early, line, False, recent_delays, recent_lines,
-                                     removed_trains, w)
-                    start_pos, last_file_number = process_marker(line)
-                else:
-                    break
-
+            snapshot = load_snapshot(snapshot_path(history_path), history_path)
+            if snapshot is not None:
+                state, history_offset = snapshot
+                state.set_retention(retention)
+                history_file.seek(history_offset, 0)
+                w.update_status(f"Loaded snapshot, replaying history from {history_offset}")
+                logging.info('Loaded snapshot, replaying history from %d', history_offset)
+            num_lines, seconds = replay_file(history_file, state)
+            w.update_status(f"Replayed {num_lines} history lines in {seconds:.2f}s")
         finally:
             history_file.close()
-            history_file = open(history_path, "a")
+            history_file = HistoryWriter(history_path, recognised_only=compact_history)
 
         logging.info("Ending history parsing")
-    update_pads(contracts, delays, early, recent_delays, removed_trains, w)
+    start_pos, last_file_number = state.start_pos, state.last_file_number
+    update_pads(state, w)
     w.redraw_pads()
 
+    perf = PerfCounters()
+    notifier = Notifier().start()
+    publisher = server = None
+    if serve_port is not None:
+        publisher = StatePublisher()
+        publisher.publish(state)
+        server = serve(publisher, serve_port)
+        w.update_status(f"Serving the state on http://127.0.0.1:{server.server_address[1]}/")
+    ingester = Ingester(tailer, state, notifier, perf, Profiler(), history_file, history_path, publisher=publisher)
+    if profile > 0:
+        ingester.request_profile(profile)
+
+    def render(dirty):
+        start = perf.start()
+        with ingester.lock:
+            update_pads(state, w, dirty)
+        if 'hud' in dirty:
+            w.update_hud(perf.hud_lines())
+        perf.stop('pads', start)
+        if not w.has_popup():
+            start = perf.start()
+            w.redraw_pads(full=False)
+            perf.stop('draw', start)
+
+    scheduler = RenderScheduler(render, fps)
+
     try:
-        logging.info(f"Old file: {last_file_number}, current file: {current_file_number}")
-        if last_file_number == current_file_number:
-            w.update_status(f"Reading {current_file} ({current_file_number}) from {start_pos}")
-            logging.info(f"Reading {current_file} from {start_pos}")
-            current_file.seek(start_pos, 0)
+        logging.info('Old file: %s, current file: %s', last_file_number, tailer.file_number)
+        if last_file_number == tailer.file_number:
+            w.update_status(f"Reading {filepath} ({tailer.file_number}) from {start_pos}")
+            logging.info('Reading %s from %d', filepath, start_pos)
+            tailer.seek(start_pos)
         else:
-            w.update_status(f"New file detected! Reading {current_file}")
-            logging.info(f"New file detected! Reading {current_file}")
+            w.update_status(f"New file detected! Reading {filepath}")
+            logging.info('New file detected! Reading %s', filepath)
+        ingester.start()
+        last_hud = time.monotonic()
         while True:
-            line = current_file.readline()
-
-            if history_file is not None:
-                history_file.write(line)
-                history_file.flush()
-
-            if line:
-                process_log_line(contracts, delays, early, line, True,
-                                 recent_delays, recent_lines, removed_trains, w)
-            else:
-                time.sleep(0.02)
-
-            if handle_input(stdscr, w, contracts):
+            for changes in ingester.drain():
+                scheduler.mark_dirty(*changes.dirty)
+                for message in changes.statuses:
+                    w.update_status(message)
+            if ingester.error is not None:
+                raise ingester.error
+            if w.show_hud and time.monotonic() - last_hud > HUD_INTERVAL:
+                scheduler.mark_dirty('hud')
+                last_hud = time.monotonic()
+            scheduler.tick()
+
+            if handle_input(stdscr, w, state.contracts, ingester):
                 break
 
-    finally:
-        if history_file is not None:
-            history_file.write(f'last_read_position: {str(current_file.tell())} of {current_file_number}\n')
-            history_file.close()
-        current_file.close()
-
-
-def process_marker(line):
-    match = re.search(r'last_read_position: (\d+) of (\d+)', line)
-    if match:
-        logging.info(f'Processing marker: {int(match.group(1))} file {int(match.group(2))}')
-        return int(match.group(1)), int(match.group(2))
-    else:
-        return 0, None
-
-
-def process_log_line(contracts, delays, early, line, update, recent_delays, recent_lines, removed_trains, w):
-    parsed = parse_log_line(line)
-    if parsed:
-        train_id, location, delay = parsed
-        train = Train(train_id, location, delay)
-        if recent_lines.append_left((train_id, location, delay)):
-            contract_type, contract_id = get_contract_id(train_id)
-            if contract_id not in contracts:
-                contracts[contract_id] = Contract(contract_id, contract_type, w)
-
-            if contracts[contract_id].new_location_for_train(train_id, location, delay):
-                w.update_status(f'Closed route {contract_id}')
-
-            if delay > 60:
-                recent_delays.append_left(train)
-                delays[train_id] = train
-                early.pop(train_id, None)
-                if delay > 120 and update:
-                    notification.notify(title=f'{train_id} delayed',
-                                        message=f'{train_id} delayed at {location:16} by {delay}', timeout=10)
-            elif delay <= -120:
-                early[train_id] = train
-                delays.pop(train_id, None)
-            else:
-                delays.pop(train_id, None)
-                early.pop(train_id, None)
-
-            for purged_trains in contracts[contract_id].purge_trains():
-                if purged_trains.current_delay() > 60 or purged_trains.current_delay() < -60:
-                    removed_trains.append_left(purged_trains)
-                else:
-                    removed_trains.remove(purged_trains)
-                delays.pop(purged_trains.tid, None)
-                early.pop(purged_trains.tid, None)
-
-            if update:
-                update_pads(contracts, delays, early, recent_delays, removed_trains, w)
-                if not w.has_popup():
-                    w.redraw_pads()
-    else:
-        tid = parse_bad_platform(line)
-        if tid:
-            w.update_status(f"{tid}: Bad platform!")
+            timeout = scheduler.time_until_next_frame() if scheduler.is_dirty() else HUD_INTERVAL
+            select.select([sys.stdin, ingester.wakeup], [], [], timeout)
 
-
-def update_pads(contracts, delays, early, recent_delays, removed_trains, w):
-    w.update_pad(sorted(delays.values(), key=lambda t: t.current_delay(), reverse=True), w.pads['delay'])
-
-    w.update_pad(sorted(early.values(), key=lambda t: t.current_delay(), reverse=True), w.pads['early'])
-    w.update_pad(list(recent_delays), w.pads['recent'])
-    w.update_pad(removed_trains, w.pads['removed'])
-    w.update_contract_pad([c for cid, c in sorted(contracts.items()) if not c.is_active()],
-                          w.pads['inactive_contract'])
-    w.update_contract_pad([c for cid, c in sorted(contracts.items()) if c.is_active()],
-                          w.pads['active_contract'])
-
-
-def handle_input(stdscr, w, contracts) -> bool:
+    finally:
+        ingester.stop()
+        ingester.close()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        notifier.stop()
+        if perf_dump:
+            perf.dump(perf_dump)
+        logging.info('Notifications sent: %d, coalesced: %d, dropped: %d', notifier.sent, notifier.coalesced,
+                     notifier.dropped)
+        logging.info('Frames rendered: %d, frames skipped: %d', scheduler.frames_rendered, scheduler.frames_skipped)
+
+
+def update_pads(state, w, dirty=None):
+    if dirty is None or 'delay' in dirty:
+        w.update_pad(state.delays.values(), w.pads['delay'])
+    if dirty is None or 'early' in dirty:
+        w.update_pad(state.early.values(), w.pads['early'])
+    if dirty is None or 'recent' in dirty:
+        w.update_pad(list(state.recent_delays), w.pads['recent'])
+    if dirty is None or 'removed' in dirty:
+        w.update_pad(state.removed_trains, w.pads['removed'])
+    if dirty is None or 'inactive_contract' in dirty:
+        w.update_contract_pad(state.inactive_contracts(), w.pads['inactive_contract'])
+    if dirty is None or 'active_contract' in dirty:
+        w.update_contract_pad(state.active_contracts(), w.pads['active_contract'])
+    if dirty is None or 'hotspots' in dirty:
+        w.update_hotspot_pad(state.hotspots, state.segments, w.pads['hotspots'])
+
+
+def handle_input(stdscr, w, contracts, ingester) -> bool:
     terminate = False
     ch = stdscr.getch()
     if w.has_popup():
@@ -206,7 +154,8 @@ def handle_input(stdscr, w, contracts) -> bool:
         if isinstance(w.popup, OpenPopup):
             if ret:
                 if ret in contracts:
-                    title, contents = contracts[ret].make_detail_view()
+                    with ingester.lock:
+                        title, contents = contracts[ret].make_detail_view()
                     w.destroy_popup()
                     w.popup = DetailedPopup(title, contents)
                 else:
@@ -232,17 +181,23 @@ def handle_input(stdscr, w, contracts) -> bool:
         w.pads['inactive_contract'].set_selection(+1)
     elif ch == ord('!'):
         w.redraw_pads()
+    elif ch == ord('h'):
+        w.toggle_hud()
+    elif ch == ord('p'):
+        ingester.request_profile(PROFILE_DURATION)
     elif ch == ord('o') or ch == ord('i'):
         w.popup = OpenPopup()
     elif ch == ord('x'):
         ref = w.pads['active_contract'].get_selection_reference()
         if isinstance(ref, Contract):
-            title, contents = ref.make_detail_view()
+            with ingester.lock:
+                title, contents = ref.make_detail_view()
             w.popup = DetailedPopup(title, contents)
     elif ch == ord('z'):
         ref = w.pads['inactive_contract'].get_selection_reference()
         if isinstance(ref, Contract):
-            title, contents = ref.make_detail_view()
+            with ingester.lock:
+                title, contents = ref.make_detail_view()
             w.popup = DetailedPopup(title, contents)
     elif ch == curses.KEY_PPAGE:
         w.pads['active_contract'].update_display_position(Pad.ScrollMode.PAGE_UP)
@@ -255,17 +210,37 @@ def handle_input(stdscr, w, contracts) -> bool:
     return terminate
 
 
-logging.basicConfig(filename='app.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) != 2 and len(sys.argv) != 3:
-        print("Usage: python monitor_log.py <log file path>")
-        sys.exit(1)
-
-    filepath_arg = sys.argv[1]
-    if len(sys.argv) == 3:
-        history_path_arg = sys.argv[2]
-    else:
-        history_path_arg = ""
-    curses.wrapper(monitor_log, filepath_arg, history_path_arg)
+    import argparse
+    from logsetup import setup_logging, LEVELS
+    parser = argparse.ArgumentParser(description="Analyse Rail Route contracts and trains from Player.log")
+    parser.add_argument("log_file", help="path to Player.log")
+    parser.add_argument("history_file", nargs="?", default="", help="history file for this map/savegame")
+    parser.add_argument("--fps", type=float, default=20, help="maximum redraws per second (default: 20)")
+    parser.add_argument("--compact-history", action="store_true",
+                        help="only keep delay, bad platform and marker lines in the history file")
+    parser.add_argument("--profile", type=float, default=0, metavar="SECONDS",
+                        help="capture a cProfile/tracemalloc profile for the first SECONDS")
+    parser.add_argument("--perf-dump", default="perf.json", metavar="PATH",
+                        help="write the performance counters to PATH on exit (default: perf.json, '' to disable)")
+    parser.add_argument("--keep-trains", type=int, default=None, metavar="N",
+                        help="keep the stops of the last N completed trains per contract, older ones are aggregated")
+    parser.add_argument("--keep-hours", type=float, default=None, metavar="HOURS",
+                        help="keep the stops of completed trains first seen within HOURS, older ones are aggregated; "
+                             "the log has no timestamps, so trains replayed from the history at startup (rather "
+                             "than loaded from the snapshot) count as first seen at startup")
+    parser.add_argument("--serve", type=int, default=None, metavar="PORT",
+                        help="serve the state as read-only JSON on http://127.0.0.1:PORT/")
+    parser.add_argument("--log-level", choices=LEVELS, default="INFO", help="verbosity of app.log (default: INFO)")
+    args = parser.parse_args()
+
+    train_retention = None
+    if args.keep_trains is not None or args.keep_hours is not None:
+        train_retention = Retention(args.keep_trains, args.keep_hours * 3600 if args.keep_hours is not None else None)
+
+    log_listener = setup_logging('app.log', args.log_level)
+    try:
+        curses.wrapper(monitor_log, args.log_file, args.history_file, args.fps, args.compact_history, args.profile,
+                       args.perf_dump, train_retention, args.serve)
+    finally:
+        log_listener.stop()
@@ -0,0 +1,101 @@
+import time
+import queue
+import logging
+import threading
+
+
+class PlyerSink:
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+
+    def __call__(self, title, message):
+        from plyer import notification
+        notification.notify(title=title, message=message, timeout=self.timeout)
+
+
+class MemorySink:
+    def __init__(self):
+        self.notifications = []
+
+    def __call__(self, title, message):
+        self.notifications.append((title, message))
+
+
+class Notifier:
+    """Delivers desktop notifications from a background thread.
+
+    Alerts with the same key within coalesce_window seconds are merged into the next one that is sent, alerts that
+    do not fit into the queue are dropped and reported as a single summary once the queue has drained.
+    """
+    def __init__(self, sink=None, max_queue=16, coalesce_window=60, min_interval=1, clock=time.monotonic):
+        self._sink = sink if sink is not None else PlyerSink()
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._coalesce_window = coalesce_window
+        self._min_interval = min_interval
+        self._clock = clock
+        self._last_sent = {}  # key -> time of the last queued alert
+        self._coalesced = {}  # key -> number of alerts merged since then
+        self._lock = threading.Lock()
+        self._thread = None
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self._dropped_since_summary = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="notifier", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1):
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def notify(self, key, title, message) -> bool:
+        now = self._clock()
+        last = self._last_sent.get(key)
+        if last is not None and now - last < self._coalesce_window:
+            self._coalesced[key] = self._coalesced.get(key, 0) + 1
+            self.coalesced += 1
+            return False
+
+        merged = self._coalesced.pop(key, 0)
+        if merged:
+            message = f'{message} (+{merged} more)'
+        try:
+            self._queue.put_nowait((title, message))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self._dropped_since_summary += 1
+            return False
+        self._last_sent[key] = now
+        return True
+
+    def _deliver(self, title, message):
+        try:
+            self._sink(title, message)
+            self.sent += 1
+        except Exception as e:
+            logging.warning('Notification failed: %r', e)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is not None:
+                self._deliver(*item)
+
+            with self._lock:
+                dropped = self._dropped_since_summary if item is None or self._queue.empty() else 0
+                self._dropped_since_summary -= dropped
+            if dropped:
+                self._deliver('Delays suppressed', f'{dropped} more delay alerts were not shown')
+            if item is None:
+                break
+            time.sleep(self._min_interval)
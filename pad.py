@@ -10,6 +10,11 @@ PadSize = namedtuple("PadSize", ["start_row", "start_column", "rows", "columns"]
 
 
 class Pad:
+    """Scrollable list of rows in a box.
+
+    The rows only live in Python; just the visible part is written to a curses window the size of the box, so the
+    cost of a frame depends on the box and not on the number of rows.
+    """
     _max_y = None
     _max_x = None
     _num_rows = None
@@ -29,9 +34,8 @@ class Pad:
         cls._num_columns = num_columns
         curses.update_lines_cols()
         curses.resizeterm(curses.LINES, curses.COLS)
-        logging.info(f'Max Y: {cls._max_y}, Max X: {cls._max_x},'
-                     f'Num Rows: {cls._num_rows}, Num Columns: {cls._num_columns},'
-                     f'{curses.COLS}, {curses.LINES}')
+        logging.info('Max Y: %s, Max X: %s,Num Rows: %s, Num Columns: %s,%s, %s', cls._max_y, cls._max_x,
+                     cls._num_rows, cls._num_columns, curses.COLS, curses.LINES)
 
     def __init__(self, pad_height, pad_width, description, pad_size, color=True):
         self._top = None
@@ -39,19 +43,26 @@ class Pad:
         self._left = None
         self._right = None
         self._border_window = None
+        self._view = None  # the visible rows, see _render()
+        self._touched = True  # the windows have to be copied to the screen as a whole on the next draw()
 
         self._display_first = 0
         self._selected = -1
         self._pad_size = pad_size
         self._desc = description
-        self._contents = {}
+        self._max_rows = pad_height
+        self._max_columns = pad_width
+        self._contents = {}  # row -> [(x_pos, line, color_pair), ...]
+        self._references = {}  # row -> reference passed to add_str
+        self._first_row = None
+        self._last_row = None
+        self._source = None  # sequence of lines shown instead of the contents, see set_source()
+        self._rendered = {}  # what is currently written to the view, per line of the view
 
         if color:
             curses.init_pair(1, curses.COLOR_BLACK, curses.COLOR_YELLOW)
             curses.init_pair(2, curses.COLOR_WHITE, curses.COLOR_RED)
 
-        self._pad = curses.newpad(pad_height, pad_width)
-
     def resize(self):
         self._top = int(self._max_y * self._pad_size.start_row / self._num_rows)
         self._bottom = int((self._max_y * (self._pad_size.rows + self._pad_size.start_row)) / self._num_rows)
@@ -61,12 +72,25 @@ class Pad:
         self.log_info(f'Resized pad to {self._top}, {self._bottom}, {self._left}, {self._right}')
         if self._right > curses.COLS or self._bottom > curses.LINES:
             raise ValueError
+        self._border_window = curses.newwin(self.height(), self.width(), self._top, self._left)
+        self._border_window.box()
+        self._border_window.addstr(0, 2, ' ' + self._desc + ' ', curses.A_REVERSE)
+        self._view = curses.newwin(max(self.content_height(), 1), max(self.view_width(), 1), self._top + 1,
+                                   self._left + 1)
+        self._rendered = {}
+        self._render()
+        self._touched = True
 
     def lines(self):
-        if not self._contents.keys():
+        if self._source is not None:
+            return len(self._source)
+        if self._first_row is None:
             return 0
-        temp = max(self._contents.keys()) - min(self._contents.keys())
-        return temp
+        return self._last_row - self._first_row + 1
+
+    def set_source(self, source):
+        """Shows the lines of a sequence (e.g. a deque that is appended to) instead of add_str contents."""
+        self._source = source
 
     def draw_scrollbar(self):
         # Calculate scrollbar slider properties
@@ -88,23 +112,52 @@ class Pad:
 
         return 1
 
-    def update_pad(self):
-        for y_pos, contents in self._contents.items():
-            for x_pos, line, color_pair in contents['elements']:
-                if color_pair is None:
-                    if y_pos == self._selected:
-                        self._pad.addstr(y_pos, x_pos, line, curses.A_REVERSE)
+    def _row(self, y_pos):
+        if self._source is not None:
+            if 0 <= y_pos < len(self._source):
+                return (0, self._source[y_pos], None),
+            return None
+        elements = self._contents.get(y_pos)
+        return tuple(elements) if elements is not None else None
+
+    def _render(self):
+        """Writes the visible rows that changed since the last call to the view."""
+        if self._view is None:
+            return
+        view_width = min(self.view_width(), self._max_columns)
+        for line in range(self.content_height()):
+            y_pos = self._display_first + line
+            row = (self._row(y_pos), y_pos == self._selected)
+            if self._rendered.get(line) == row:
+                continue
+            if line in self._rendered:
+                self._view.move(line, 0)
+                self._view.clrtoeol()
+            self._rendered[line] = row
+            for x_pos, text, color_pair in row[0] or ():
+                if x_pos >= view_width:
+                    continue
+                text = text[:view_width - x_pos]
+                try:
+                    if color_pair is None:
+                        if y_pos == self._selected:
+                            self._view.addstr(line, x_pos, text, curses.A_REVERSE)
+                        else:
+                            self._view.addstr(line, x_pos, text)
                     else:
-                        self._pad.addstr(y_pos, x_pos, line)
-                else:
-                    self._pad.addstr(y_pos, x_pos, line, color_pair)
+                        self._view.addstr(line, x_pos, text, color_pair)
+                except curses.error:
+                    pass  # writing the bottom right corner fails after the text has been written
+
+    def update_pad(self):
+        self._render()
 
     def update_draw(self):
         self.update_pad()
         self.draw()
 
     def log_info(self, string):
-        logging.info(f'{self._desc[:16]} {string}')
+        logging.info('%s %s', self._desc[:16], string)
 
     def adjust_view(self):
         if (self._selected < self._display_first) or (self._selected > self._display_first + self.content_height() - 1):
@@ -114,15 +167,25 @@ class Pad:
         if (self._selected < self._display_first) or (self._selected > self._display_first + self.content_height()):
             self._selected = -1
 
-    def draw(self):
-        self._border_window = curses.newwin(self.height(), self.width(), self._top, self._left)
-        self._border_window.box()
-        self._border_window.addstr(0, 2, ' ' + self._desc + ' ', curses.A_REVERSE)
-        self._border_window.refresh()
-
-        d = self.draw_scrollbar()
-
-        self._pad.refresh(self._display_first, 0, self._top + 1, self._left + 1, self._bottom - 2, self._right - 2 - d)
+    def touch(self):
+        """Makes the next draw() repaint the whole pad, e.g. after something was drawn over it."""
+        self._touched = True
+
+    def draw(self, update=True):
+        """Stages the changes of the pad for the screen; update=False leaves the curses.doupdate() to the caller."""
+        if self._touched:
+            self._border_window.touchwin()
+        self.draw_scrollbar()
+        self._border_window.noutrefresh()
+
+        self._render()
+        # the border window covers the view, so the view has to be copied after it when the border was copied whole
+        if self._touched:
+            self._view.touchwin()
+            self._touched = False
+        self._view.noutrefresh()
+        if update:
+            curses.doupdate()
 
     def set_selection(self, direction):
         if self._selected == -1:
@@ -134,18 +197,17 @@ class Pad:
                 case _:
                     raise ValueError
         else:
-            self._selected = max(0, min(self._selected + direction, self.lines()))
+            self._selected = max(0, min(self._selected + direction, self.lines() - 1))
         self.adjust_view()
         self.update_draw()
 
     def get_selection(self):
-        ref = self._contents[self._selected]['reference']
-        return ref
+        return self._references.get(self._selected)
 
     def get_selection_reference(self):
         if self._selected < 0:
             return None
-        return self._contents[self._selected]['reference']
+        return self._references.get(self._selected)
 
     def update_display_position(self, mode):
         match mode:
@@ -165,15 +227,22 @@ class Pad:
 
     def prepare(self):
         self._contents.clear()
-        self._pad.erase()
+        self._references.clear()
+        self._first_row = self._last_row = None
 
     def add_str(self, y_pos, x_pos, line, ref=None, color_pair=None):
-        if y_pos not in self._contents:
-            self._contents[y_pos] = {}
-        if 'elements' not in self._contents[y_pos]:
-            self._contents[y_pos]['elements'] = list()
-        self._contents[y_pos]['elements'].append((x_pos, line, color_pair))
-        self._contents[y_pos]['reference'] = ref
+        if y_pos >= self._max_rows:
+            return
+        elements = self._contents.get(y_pos)
+        if elements is None:
+            elements = self._contents[y_pos] = []
+            if self._first_row is None:
+                self._first_row = self._last_row = y_pos
+            else:
+                self._first_row = min(self._first_row, y_pos)
+                self._last_row = max(self._last_row, y_pos)
+        elements.append((x_pos, line, color_pair))
+        self._references[y_pos] = ref
 
     def height(self):
         return self._bottom - self._top
@@ -183,3 +252,7 @@ class Pad:
 
     def width(self):
         return self._right - self._left
+
+    def view_width(self):
+        # inside the border, next to the scrollbar
+        return self.width() - 3
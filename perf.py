@@ -0,0 +1,129 @@
+import io
+import json
+import time
+import pstats
+import logging
+import cProfile
+import tracemalloc
+
+from collections import deque
+
+STAGES = ('parse', 'state', 'pads', 'draw')
+
+
+class PerfCounters:
+    """Timing counters for the stages of the parse loop and the render path.
+
+    Each stage keeps its recent durations for percentiles; use start() and stop() around a stage, they are cheap enough
+    to run for every line.
+    """
+    SAMPLES = 2048
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self._samples = {stage: deque(maxlen=self.SAMPLES) for stage in STAGES}
+        self._totals = {stage: 0.0 for stage in STAGES}
+        self._counts = {stage: 0 for stage in STAGES}
+        self.lines = 0
+        self.backlog_bytes = 0
+        self._started = clock()
+        self._rate_time = self._started
+        self._rate_lines = 0
+        self.lines_per_second = 0.0
+
+    def start(self):
+        return self.clock()
+
+    def stop(self, stage, start):
+        duration = self.clock() - start
+        self._samples[stage].append(duration)
+        self._totals[stage] += duration
+        self._counts[stage] += 1
+        return duration
+
+    def add_lines(self, num_lines):
+        self.lines += num_lines
+
+    def update_rate(self):
+        now = self.clock()
+        if now > self._rate_time:
+            self.lines_per_second = (self.lines - self._rate_lines) / (now - self._rate_time)
+        self._rate_time, self._rate_lines = now, self.lines
+
+    def percentile(self, stage, p):
+        samples = sorted(self._samples[stage])
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+    def summary(self) -> dict:
+        uptime = self.clock() - self._started
+        return {
+            'uptime': uptime,
+            'lines': self.lines,
+            'lines_per_second': self.lines_per_second,
+            'average_lines_per_second': self.lines / uptime if uptime > 0 else 0.0,
+            'backlog_bytes': self.backlog_bytes,
+            'stages': {stage: {'count': self._counts[stage], 'total': self._totals[stage],
+                               'p50': self.percentile(stage, 50), 'p99': self.percentile(stage, 99)}
+                       for stage in STAGES},
+        }
+
+    def hud_lines(self) -> list:
+        self.update_rate()
+        lines = [f'{self.lines_per_second:10.0f} lines/s  {self.lines} lines  {self.backlog_bytes} bytes behind EOF',
+                 f'{"stage":>8} {"count":>9} {"p50 us":>9} {"p99 us":>9} {"total s":>9}']
+        for stage in STAGES:
+            lines.append(f'{stage:>8} {self._counts[stage]:9d} {self.percentile(stage, 50) * 1e6:9.1f} '
+                         f'{self.percentile(stage, 99) * 1e6:9.1f} {self._totals[stage]:9.3f}')
+        return lines
+
+    def dump(self, path):
+        with open(path, "w") as dump_file:
+            json.dump(self.summary(), dump_file, indent=2)
+        logging.info('Wrote performance counters to %s', path)
+
+
+class Profiler:
+    """Captures cProfile and tracemalloc data for a bounded interval."""
+    def __init__(self, prefix='profile', clock=time.monotonic):
+        self._prefix = prefix
+        self._clock = clock
+        self._profile = None
+        self._until = None
+
+    def is_running(self) -> bool:
+        return self._profile is not None
+
+    def start(self, duration):
+        if self.is_running():
+            return
+        self._until = self._clock() + duration
+        tracemalloc.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+        logging.info('Profiling for %ss', duration)
+
+    def check(self):
+        """Returns the file names written once the interval is over, None while it lasts or nothing is captured."""
+        if self.is_running() and self._clock() >= self._until:
+            return self.stop()
+        return None
+
+    def stop(self):
+        self._profile.disable()
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        profile_path = f'{self._prefix}-{stamp}.prof'
+        self._profile.dump_stats(profile_path)
+        stats = io.StringIO()
+        pstats.Stats(self._profile, stream=stats).sort_stats('cumulative').print_stats(30)
+        memory_path = f'{self._prefix}-{stamp}-memory.txt'
+        with open(memory_path, "w") as memory_file:
+            memory_file.write(stats.getvalue())
+            memory_file.write('\nTop allocations:\n')
+            for stat in tracemalloc.take_snapshot().statistics('lineno')[:30]:
+                memory_file.write(f'{stat}\n')
+        tracemalloc.stop()
+        self._profile = None
+        logging.info('Wrote %s and %s', profile_path, memory_path)
+        return profile_path, memory_path
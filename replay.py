@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import time
+import logging
+
+from state import State
+
+
+def replay_file(file, state):
+    start = time.perf_counter()
+    lines = state.lines_processed
+    for line in file:
+        state.process_history_line(line)
+    elapsed = time.perf_counter() - start
+    lines = state.lines_processed - lines
+    rate = lines / elapsed if elapsed > 0 else 0.0
+    logging.info('Replayed %d lines in %.3fs (%.0f lines/s)', lines, elapsed, rate)
+    return lines, elapsed
+
+
+def replay(path, state=None) -> State:
+    if state is None:
+        state = State()
+    with open(path, "r") as file:
+        replay_file(file, state)
+    return state
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 2:
+        print("Usage: python replay.py <history file> [<history file> ...]")
+        sys.exit(1)
+
+    for history_path_arg in sys.argv[1:]:
+        replayed_state = State()
+        with open(history_path_arg, "r") as history_file:
+            num_lines, seconds = replay_file(history_file, replayed_state)
+        print(f'{history_path_arg}: {replayed_state.summary()}')
+        print(f'  {num_lines} lines in {seconds:.3f}s ({num_lines / seconds if seconds > 0 else 0:.0f} lines/s)')
+        for contract in replayed_state.active_contracts() + replayed_state.inactive_contracts():
+            print(f'  {contract.print_info()}  {contract.memory_usage() / 1024:.0f} KiB')
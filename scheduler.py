@@ -0,0 +1,40 @@
+import time
+
+
+class RenderScheduler:
+    def __init__(self, render, fps=20, clock=time.monotonic):
+        self._render = render
+        self._interval = 1 / fps if fps > 0 else 0
+        self._clock = clock
+        self._dirty = set()
+        self._last_frame = None
+        self.frames_rendered = 0
+        self.frames_skipped = 0
+
+    def mark_dirty(self, *pad_ids):
+        if self._dirty:
+            # this change is merged into the frame that is already pending
+            self.frames_skipped += 1
+        self._dirty.update(pad_ids)
+
+    def is_dirty(self) -> bool:
+        return bool(self._dirty)
+
+    def time_until_next_frame(self) -> float:
+        if self._last_frame is None:
+            return 0
+        return max(0, self._last_frame + self._interval - self._clock())
+
+    def tick(self) -> bool:
+        if not self._dirty or self.time_until_next_frame() > 0:
+            return False
+        return self.flush()
+
+    def flush(self) -> bool:
+        if not self._dirty:
+            return False
+        dirty, self._dirty = self._dirty, set()
+        self._last_frame = self._clock()
+        self._render(dirty)
+        self.frames_rendered += 1
+        return True
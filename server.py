@@ -0,0 +1,192 @@
+import json
+import time
+import logging
+import threading
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, unquote
+
+
+def contract_summary(contract) -> dict:
+    return {
+        'id': contract.cid,
+        'type': contract.ctype,
+        'route_complete': contract.route_complete,
+        'start': contract.start_of_route(),
+        'end': contract.end_of_route(),
+        'stations': contract.length_of_route(),
+        'active_trains': contract.number_of_trains(),
+        'completed_trains': len(contract.completed_trains),
+        'evicted_trains': contract.evicted_trains,
+        'delay_info': contract.get_delay_info(),
+    }
+
+
+def train_summary(train) -> dict:
+    return {'train': train.tid, 'location': train.current_location(), 'delay': train.current_delay()}
+
+
+def train_delays(route, train) -> tuple:
+    """The delay of the train per station of the route, None where it did not stop (as in the detail view)."""
+    delays = [None] * len(route)
+    if train.first_location() in route:
+        start_of_route = route.index(train.first_location())
+        for idx, stop in enumerate(train.stops()[:len(route) - start_of_route], start=start_of_route):
+            delays[idx] = stop.delay
+    return tuple(delays)
+
+
+class ContractView:
+    """Immutable copy of a contract with its detail matrix, shared by the snapshots until the contract changes."""
+    __slots__ = ('version', 'summary', 'route', 'completed', 'active', 'evicted', '_encoded')
+
+    def __init__(self, contract, version, previous=None):
+        self.version = version
+        self.summary = contract_summary(contract)
+        self.route = tuple(contract.route)
+        # the rows of completed trains only change with the route, so they are taken over from the previous view
+        reusable = previous.completed if previous is not None and previous.route == self.route else {}
+        self.completed = {}
+        for tid, train in contract.completed_trains.items():
+            if tid in contract.trains:
+                continue  # a new run of the train is active, it is shown once
+            row = reusable.get(tid)
+            if row is None or row[0] is not train:
+                row = (train, train_delays(self.route, train))
+            self.completed[tid] = row
+        self.active = [(train, train_delays(self.route, train))
+                       for train in sorted(contract.trains.values(), key=lambda t: t.time_of_birth())]
+        self.evicted = {'trains': contract.evicted_trains,
+                        'mean': [contract.evicted[location].mean() if location in contract.evicted else None
+                                 for location in self.route]}
+        self._encoded = None
+
+    def encoded(self) -> bytes:
+        # encoded by the first request, racing requests encode the same bytes
+        if self._encoded is None:
+            completed = sorted(self.completed.values(), key=lambda row: row[0].time_of_birth())
+            self._encoded = _encode({
+                'contract': self.summary,
+                'route': self.route,
+                'trains': [{'train': train.tid, 'active': active, 'born': train.time_of_birth(), 'delays': delays}
+                           for rows, active in ((completed, False), (self.active, True)) for train, delays in rows],
+                'evicted': self.evicted,
+            })
+        return self._encoded
+
+
+class StateSnapshot:
+    """What the server answers from; published as a whole by the ingester and never changed afterwards."""
+    def __init__(self, version, lines_processed, contracts, active, inactive, delayed, early):
+        self.version = version
+        self.lines_processed = lines_processed
+        self.contracts = contracts  # contract id -> ContractView
+        self.active = active
+        self.inactive = inactive
+        self.delayed = delayed
+        self.early = early
+        self._encoded = {}
+
+    def resource(self, path):
+        """(ETag, JSON body) of path, None if there is no such resource."""
+        if path not in self._encoded:
+            if path == '/':
+                document = {'version': self.version, 'lines_processed': self.lines_processed,
+                            'contracts': len(self.contracts), 'active': len(self.active),
+                            'inactive': len(self.inactive), 'delayed': len(self.delayed), 'early': len(self.early)}
+            elif path == '/contracts/active':
+                document = [self.contracts[cid].summary for cid in self.active]
+            elif path == '/contracts/inactive':
+                document = [self.contracts[cid].summary for cid in self.inactive]
+            elif path == '/trains/delayed':
+                document = self.delayed
+            elif path == '/trains/early':
+                document = self.early
+            elif path.startswith('/contracts/') and path.count('/') == 2:
+                view = self.contracts.get(unquote(path[len('/contracts/'):]))
+                return (f'"c{view.version}"', view.encoded()) if view is not None else None
+            else:
+                return None
+            self._encoded[path] = _encode(document)
+        return f'"s{self.version}"', self._encoded[path]
+
+
+def _encode(document) -> bytes:
+    return json.dumps(document, separators=(',', ':')).encode()
+
+
+class StatePublisher:
+    """Turns the state into StateSnapshots for the server, at most every interval seconds.
+
+    Runs in the ingestion thread, which is the only writer of the state, so it reads the state without the lock.
+    Contracts that were not touched since the last snapshot keep their ContractView (copy on write); readers only
+    follow the snapshot attribute and never wait for the ingester.
+    """
+    def __init__(self, interval=1.0, clock=time.monotonic):
+        self.interval = interval
+        self.clock = clock
+        self.snapshot = None
+        self.version = 0
+        self._touched = set()
+        self._last_publish = None
+
+    def touch(self, contract_id):
+        self._touched.add(contract_id)
+
+    def is_due(self) -> bool:
+        if self.snapshot is None:
+            return True
+        return bool(self._touched) and self.clock() - self._last_publish >= self.interval
+
+    def publish(self, state) -> StateSnapshot:
+        self.version += 1
+        previous = self.snapshot.contracts if self.snapshot is not None else {}
+        contracts = dict(previous)
+        for cid, contract in state.contracts.items():
+            if cid in self._touched or cid not in previous:
+                contracts[cid] = ContractView(contract, self.version, previous.get(cid))
+        self._touched = set()
+        self.snapshot = StateSnapshot(self.version, state.lines_processed, contracts,
+                                      tuple(contract.cid for contract in state.active_contracts()),
+                                      tuple(contract.cid for contract in state.inactive_contracts()),
+                                      [train_summary(train) for train in state.delays.values()],
+                                      [train_summary(train) for train in state.early.values()])
+        self._last_publish = self.clock()
+        return self.snapshot
+
+
+class StateRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        snapshot = self.server.publisher.snapshot
+        if snapshot is None:
+            self.send_error(503, 'No state published yet')
+            return
+        resource = snapshot.resource(urlsplit(self.path).path.rstrip('/') or '/')
+        if resource is None:
+            self.send_error(404)
+            return
+        etag, body = resource
+        if etag in self.headers.get('If-None-Match', ''):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug('%s %s', self.address_string(), format % args)
+
+
+def serve(publisher, port, host='127.0.0.1') -> ThreadingHTTPServer:
+    """Serves the snapshots of publisher as JSON from a daemon thread; stop with shutdown() and server_close()."""
+    server = ThreadingHTTPServer((host, port), StateRequestHandler)
+    server.daemon_threads = True
+    server.publisher = publisher
+    threading.Thread(target=server.serve_forever, name='http', daemon=True).start()
+    logging.info('Serving the state on http://%s:%d/', host, server.server_address[1])
+    return server
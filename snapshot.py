@@ -0,0 +1,42 @@
+import os
+import pickle
+import logging
+
+# Bump whenever the pickled layout of State, Contract, Train or UniqueDeque changes.
+SNAPSHOT_VERSION = 12
+
+
+def snapshot_path(history_path):
+    return f'{history_path}.snapshot'
+
+
+def save_snapshot(path, state, history_offset, history_inode):
+    data = pickle.dumps((SNAPSHOT_VERSION, history_inode, history_offset, state), protocol=pickle.HIGHEST_PROTOCOL)
+    temp_path = f'{path}.tmp'
+    with open(temp_path, "wb") as snapshot_file:
+        snapshot_file.write(data)
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+    os.replace(temp_path, path)
+    logging.info('Wrote snapshot %s: %d bytes at history offset %d', path, len(data), history_offset)
+
+
+def load_snapshot(path, history_path):
+    """Returns (state, history_offset) or None if the snapshot cannot be used for this history file."""
+    try:
+        with open(path, "rb") as snapshot_file:
+            version, history_inode, history_offset, state = pickle.load(snapshot_file)
+    except FileNotFoundError:
+        return None
+    except (pickle.UnpicklingError, AttributeError, EOFError, ImportError, TypeError, ValueError) as e:
+        logging.warning('Discarding unreadable snapshot %s: %r', path, e)
+        return None
+
+    if version != SNAPSHOT_VERSION:
+        logging.info('Discarding snapshot %s: version %s, expected %d', path, version, SNAPSHOT_VERSION)
+        return None
+    history_stat = os.stat(history_path)
+    if history_stat.st_ino != history_inode or history_stat.st_size < history_offset:
+        logging.info('Discarding snapshot %s: history file changed', path)
+        return None
+    return state, history_offset
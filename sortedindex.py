@@ -0,0 +1,55 @@
+from bisect import bisect_left, insort
+
+
+class SortedIndex:
+    """Mapping whose values are kept ordered by key(value).
+
+    Ties keep insertion order, like sorted() over a dict would; updating an existing entry keeps its place among
+    equal keys. Re-sort a value by assigning it again after it changed.
+    """
+    def __init__(self, key):
+        self._key = key
+        self._items = {}  # id -> (sort key, sequence number, value)
+        self._order = []  # sorted (sort key, sequence number, id)
+        self._next_seq = 0
+
+    def __setitem__(self, item_id, value):
+        sort_key = self._key(value)
+        if item_id in self._items:
+            old_key, seq, _ = self._items[item_id]
+            if old_key != sort_key:
+                del self._order[bisect_left(self._order, (old_key, seq))]
+                insort(self._order, (sort_key, seq, item_id))
+        else:
+            seq = self._next_seq
+            self._next_seq += 1
+            insort(self._order, (sort_key, seq, item_id))
+        self._items[item_id] = (sort_key, seq, value)
+
+    def __getitem__(self, item_id):
+        return self._items[item_id][2]
+
+    def pop(self, item_id, default=None):
+        if item_id not in self._items:
+            return default
+        sort_key, seq, value = self._items.pop(item_id)
+        del self._order[bisect_left(self._order, (sort_key, seq))]
+        return value
+
+    def __contains__(self, item_id):
+        return item_id in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return (item_id for _, _, item_id in self._order)
+
+    def values(self):
+        return (self._items[item_id][2] for _, _, item_id in self._order)
+
+    def items(self):
+        return ((item_id, self._items[item_id][2]) for _, _, item_id in self._order)
+
+    def __repr__(self):
+        return f'SortedIndex({list(self)})'
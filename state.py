@@ -0,0 +1,147 @@
+import logging
+
+from collections import namedtuple
+
+from contract import Contract
+from hotspots import HotspotIndex
+from logparser import classify, get_contract_id, DelayEvent, MarkerEvent
+from sortedindex import SortedIndex
+from train import Train
+from uniquedeque import UniqueDeque
+
+Arrival = namedtuple("Arrival", ["train", "contract_id", "closed_route", "purged"])
+
+
+def _by_delay(train):
+    return -train.current_delay()
+
+
+def _by_contract_id(contract):
+    return contract.cid
+
+
+class State:
+    def __init__(self, retention=None):
+        self.contracts = {}
+        self.retention = retention  # Retention of completed trains for new contracts
+        # ordered views for rendering, kept up to date on every change instead of sorting per frame
+        self.delays = SortedIndex(key=_by_delay)
+        self.early = SortedIndex(key=_by_delay)
+        self._active_contracts = SortedIndex(key=_by_contract_id)
+        self._inactive_contracts = SortedIndex(key=_by_contract_id)
+        self.recent_delays = UniqueDeque(max_length=12)
+        self.recent_lines = UniqueDeque(max_length=200)  # window of the duplicate line filter, not a display buffer
+        self.removed_trains = UniqueDeque(max_length=1000)
+        # delay per location and delay gained per segment (pair of consecutive stops), over all contracts
+        self.hotspots = HotspotIndex()
+        self.segments = HotspotIndex()
+        self.start_pos = 0
+        self.last_file_number = None
+        self.lines_processed = 0
+
+    def process_line(self, line):
+        """Applies a log line; returns an Arrival, the BadPlatformEvent/MarkerEvent of the line or None."""
+        return self.process_event(classify(line))
+
+    def process_event(self, event):
+        self.lines_processed += 1
+        if isinstance(event, DelayEvent):
+            return self.apply_delay(*event)
+        return event
+
+    def process_history_line(self, line):
+        event = self.process_line(line)
+        if isinstance(event, MarkerEvent):
+            logging.debug('Processing marker: %s file %s', event.position, event.file_number)
+            self.start_pos, self.last_file_number = event
+        else:
+            self.start_pos, self.last_file_number = 0, None
+        return event
+
+    def apply_delay(self, train_id, location, delay):
+        if not self.recent_lines.append_left((train_id, location, delay)):
+            return None
+
+        contract_type, contract_id = get_contract_id(train_id)
+        if contract_id not in self.contracts:
+            self.contracts[contract_id] = Contract(contract_id, contract_type, retention=self.retention)
+        contract = self.contracts[contract_id]
+
+        previous_stop = None
+        if train_id in contract.trains:
+            previous = contract.trains[train_id]
+            previous_stop = previous.current_location(), previous.current_delay()
+
+        closed_route = contract.new_location_for_train(train_id, location, delay)
+        train = contract.trains[train_id]
+
+        self.hotspots.add(location, delay)
+        if previous_stop is not None and previous_stop[0] != location:
+            self.segments.add((previous_stop[0], location), delay - previous_stop[1])
+
+        if delay > 60:
+            if train not in self.recent_delays:
+                # recent delays keep showing the location and delay at the time of the delay
+                self.recent_delays.append_left(Train(train_id, location, delay))
+            self.delays[train_id] = train
+            self.early.pop(train_id, None)
+        elif delay <= -120:
+            self.early[train_id] = train
+            self.delays.pop(train_id, None)
+        else:
+            self.delays.pop(train_id, None)
+            self.early.pop(train_id, None)
+
+        purged = contract.purge_trains()
+        for purged_train in purged:
+            if purged_train.current_delay() > 60 or purged_train.current_delay() < -60:
+                self.removed_trains.append_left(purged_train)
+            else:
+                self.removed_trains.remove(purged_train)
+            self.delays.pop(purged_train.tid, None)
+            self.early.pop(purged_train.tid, None)
+        self._update_contract_index(contract)
+
+        return Arrival(train, contract_id, closed_route, purged)
+
+    def _update_contract_index(self, contract):
+        if contract.is_active():
+            if contract.cid not in self._active_contracts:
+                self._active_contracts[contract.cid] = contract
+                self._inactive_contracts.pop(contract.cid)
+        elif contract.cid not in self._inactive_contracts:
+            self._inactive_contracts[contract.cid] = contract
+            self._active_contracts.pop(contract.cid)
+
+    def active_contracts(self) -> list:
+        return list(self._active_contracts.values())
+
+    def inactive_contracts(self) -> list:
+        return list(self._inactive_contracts.values())
+
+    def set_retention(self, retention):
+        """Applies a retention policy to new and existing contracts, e.g. after loading a snapshot."""
+        self.retention = retention
+        for contract in self.contracts.values():
+            contract.retention = retention
+            if retention is not None:
+                contract.evict_trains()
+
+    def evict_trains(self, now=None) -> list:
+        """Applies an age limit of the retention policy to every contract, also those without new arrivals.
+
+        Returns the ids of the contracts that evicted trains.
+        """
+        if self.retention is None or self.retention.max_age is None:
+            return []
+        return [cid for cid, contract in self.contracts.items()
+                if contract.retention is not None and contract.evict_trains(now)]
+
+    def memory_usage(self) -> dict:
+        """Approximate bytes per contract id, largest first."""
+        usage = {cid: contract.memory_usage() for cid, contract in self.contracts.items()}
+        return dict(sorted(usage.items(), key=lambda item: -item[1]))
+
+    def summary(self) -> str:
+        return (f'{self.lines_processed} lines, {len(self.contracts)} contracts '
+                f'({len(self.active_contracts())} active), {len(self.delays)} delayed, {len(self.early)} early')
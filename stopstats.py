@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+
+
+def group_stats(keys, values, num_groups, percentiles=PERCENTILES) -> dict:
+    """Count, mean, max, early-arrival rate and percentiles of values per group, without a loop over the groups.
+
+    keys are the group indices (0 <= key < num_groups); percentiles use the nearest lower rank.
+    """
+    keys = np.asarray(keys, dtype=np.intp)
+    values = np.asarray(values, dtype=np.float64)
+    count = np.bincount(keys, minlength=num_groups)
+    nonempty = count > 0
+    total = np.bincount(keys, weights=values, minlength=num_groups)
+    early = np.bincount(keys, weights=values <= -60, minlength=num_groups)
+    stats = {
+        'count': count,
+        'mean': np.divide(total, count, out=np.zeros(num_groups), where=nonempty),
+        'early_rate': np.divide(early, count, out=np.zeros(num_groups), where=nonempty),
+    }
+    # one sort by (group, value) gives every group's values in order, starting at the cumulated counts
+    ordered = values[np.lexsort((values, keys))] if len(values) else np.zeros(1)
+    starts = np.cumsum(count) - count
+    last_index = len(ordered) - 1
+    stats['max'] = np.where(nonempty, ordered[np.clip(starts + count - 1, 0, last_index)], np.nan)
+    for p in percentiles:
+        rank = starts + (np.maximum(count - 1, 0) * p) // 100
+        stats[f'p{p}'] = np.where(nonempty, ordered[np.minimum(rank, last_index)], np.nan)
+    return stats
+
+
+def contract_stats(columns) -> dict:
+    return group_stats(columns['contract'], columns['delay'], len(columns['contracts']))
+
+
+def station_stats(columns) -> dict:
+    return group_stats(columns['location'], columns['delay'], len(columns['locations']))
+
+
+def segment_stats(columns):
+    """Delay picked up between consecutive stops of a train run, per (from, to) location pair.
+
+    Returns the segments as an (n, 2) array of location indices and their group_stats.
+    """
+    order = np.lexsort((columns['seq'], columns['train']))
+    train = columns['train'][order]
+    location = columns['location'][order].astype(np.int64)
+    delay = columns['delay'][order].astype(np.float64)
+    same_run = train[1:] == train[:-1]
+    origin, destination = location[:-1][same_run], location[1:][same_run]
+    gain = (delay[1:] - delay[:-1])[same_run]
+    num_locations = len(columns['locations'])
+    segments, keys = np.unique(origin * num_locations + destination, return_inverse=True)
+    pairs = np.stack((segments // num_locations, segments % num_locations), axis=1)
+    return pairs, group_stats(keys.ravel(), gain, len(segments))
+
+
+def worst_segments(columns, top=10, min_count=3) -> list:
+    """The segments where trains lose the most time on average: (from, to, count, mean, max)."""
+    pairs, stats = segment_stats(columns)
+    candidates = np.flatnonzero(stats['count'] >= min_count)
+    worst = candidates[np.argsort(-stats['mean'][candidates], kind='stable')][:top]
+    locations = columns['locations']
+    return [(str(locations[pairs[i, 0]]), str(locations[pairs[i, 1]]), int(stats['count'][i]),
+             float(stats['mean'][i]), float(stats['max'][i])) for i in worst]
+
+
+def format_table(title, names, stats, top=20) -> list:
+    lines = [f'{title} by mean delay:',
+             f'  {"":20} {"stops":>7} {"mean":>8} ' + ' '.join(f'{f"p{p}":>7}' for p in PERCENTILES) +
+             f' {"max":>7} {"early":>6}']
+    for i in np.argsort(-stats['mean'], kind='stable')[:top]:
+        if stats['count'][i] == 0:
+            continue
+        lines.append(f'  {str(names[i])[:20]:20} {stats["count"][i]:7d} {stats["mean"][i]:8.1f} ' +
+                     ' '.join(f'{stats[f"p{p}"][i]:7.0f}' for p in PERCENTILES) +
+                     f' {stats["max"][i]:7.0f} {stats["early_rate"][i]:6.1%}')
+    return lines
+
+
+if __name__ == "__main__":
+    import sys
+    import columns as stop_columns
+    if len(sys.argv) < 2:
+        print("Usage: python stopstats.py <history file or .npz export> [top]")
+        sys.exit(1)
+
+    num_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    if sys.argv[1].endswith('.npz'):
+        data = stop_columns.load(sys.argv[1])
+    else:
+        with open(sys.argv[1], "r") as history_file:
+            data = stop_columns.from_history(history_file).as_arrays()
+    print('\n'.join(format_table('Contracts', data['contracts'], contract_stats(data), num_rows)))
+    print('\n'.join(format_table('Stations', data['locations'], station_stats(data), num_rows)))
+    print('Worst segments by mean delay gained:')
+    for origin_name, destination_name, num_stops, mean, worst in worst_segments(data, num_rows):
+        print(f'  {origin_name[:20]:>20} -> {destination_name[:20]:20} {num_stops:7d} {mean:8.1f} {worst:7.0f}')
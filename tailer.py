@@ -0,0 +1,145 @@
+import os
+import errno
+import select
+import ctypes
+import logging
+import ctypes.util
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+
+class Inotify:
+    """Watches the directory of a file through inotify, so that appends, rotation and truncation all wake us up."""
+    def __init__(self, fd):
+        self._fd = fd
+
+    @classmethod
+    def create(cls, path):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+        directory = os.path.dirname(os.path.abspath(path))
+        mask = IN_MODIFY | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        if libc.inotify_add_watch(fd, directory.encode(), mask) < 0:
+            logging.info('inotify watch on %s failed: %s', directory, os.strerror(ctypes.get_errno()))
+            os.close(fd)
+            return None
+        return cls(fd)
+
+    def fileno(self):
+        return self._fd
+
+    def drain(self):
+        try:
+            while os.read(self._fd, 4096):
+                pass
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                raise
+
+    def close(self):
+        os.close(self._fd)
+
+
+class Tailer:
+    CHUNK_SIZE = 1 << 20
+    MIN_POLL = 0.005
+    MAX_POLL = 0.25
+
+    def __init__(self, path, use_inotify=True):
+        self.path = path
+        self._file = None
+        self.file_number = None
+        self.position = 0  # offset right behind the last complete line returned
+        self._partial = b''
+        self._chunk = (0, [])  # start offset and raw lines of the last read_lines(), for position_after()
+        self._poll_interval = self.MIN_POLL
+        self._inotify = Inotify.create(path) if use_inotify else None
+        logging.info('Tailing %s using %s', path, 'inotify' if self._inotify else 'polling')
+        self._open()
+
+    def _open(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "rb")
+        self.file_number = os.fstat(self._file.fileno()).st_ino
+        self.position = 0
+        self._partial = b''
+
+    def seek(self, position):
+        self._file.seek(position, 0)
+        self.position = position
+        self._partial = b''
+
+    def read_lines(self) -> list:
+        data = self._file.read(self.CHUNK_SIZE)
+        if not data:
+            return []
+        self._poll_interval = self.MIN_POLL
+        data = self._partial + data
+        lines = data.split(b'\n')
+        # the last element is an incomplete line (or empty), it is completed by the next read
+        self._partial = lines.pop()
+        self._chunk = (self.position, lines)
+        self.position += len(data) - len(self._partial)
+        return [line.rstrip(b'\r').decode('utf-8', 'replace') + '\n' for line in lines]
+
+    def position_after(self, num_lines):
+        """Offset right behind the first num_lines lines returned by the last read_lines()."""
+        start, lines = self._chunk
+        return start + sum(len(line) + 1 for line in lines[:num_lines])
+
+    def backlog(self):
+        """Bytes written to the file that have not been returned as lines yet."""
+        return os.fstat(self._file.fileno()).st_size - self.position
+
+    def check_rotation(self):
+        """Reopens the file if it was replaced or truncated; returns a description of what happened or None."""
+        try:
+            file_stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        if file_stat.st_ino != self.file_number:
+            self._open()
+            message = f'{self.path} was replaced, reading new file {self.file_number}'
+        elif file_stat.st_size < self.position + len(self._partial):
+            self.seek(0)
+            message = f'{self.path} was truncated, reading from the start'
+        else:
+            return None
+        logging.info('%s', message)
+        return message
+
+    def wait(self, timeout, extra_fds=()) -> list:
+        """Blocks until the file may have grown, one of extra_fds is readable or timeout has passed."""
+        fds = list(extra_fds)
+        if self._inotify is not None:
+            fds.append(self._inotify)
+        else:
+            timeout = min(timeout, self._poll_interval)
+            self._poll_interval = min(self._poll_interval * 2, self.MAX_POLL)
+        if fds:
+            ready, _, _ = select.select(fds, [], [], timeout)
+        else:
+            select.select([], [], [], timeout)
+            ready = []
+        if self._inotify is not None and self._inotify in ready:
+            self._inotify.drain()
+            ready.remove(self._inotify)
+        return ready
+
+    def close(self):
+        self._file.close()
+        if self._inotify is not None:
+            self._inotify.close()
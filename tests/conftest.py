@@ -1,5 +1,32 @@
 import sys
 import os
 
+import pytest
+
 # Add the parent directory to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+class FakeClock:
+    """A clock for the clock= parameters, advanced by setting now."""
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def fake_curses(monkeypatch):
+    """Replaces curses with the fake screen of the benchmarks, recording the calls of every window."""
+    import curses
+    from benchmarks.fakecurses import FakeScreen, replacements
+    screen = FakeScreen(50, 200, record=True)
+    for name, value in replacements(screen).items():
+        monkeypatch.setattr(curses, name, value, raising=False)
+    return screen
@@ -0,0 +1,71 @@
+from analyze import analyze, history_files, DelaySummary
+
+MAP_A = """Delay for train IC123-1[Alpha]: 00:00:30
+Delay for train IC123-1[Beta]: 00:02:30
+Delay for train IC123-2[Alpha]: -00:03:00
+"""
+
+MAP_B = """Delay for train IC123-1[Alpha]: 00:01:30
+Delay for train Reg456A1[Gamma]: 00:00:00
+"""
+
+
+def test_delay_summary_merge():
+    first, second = DelaySummary(), DelaySummary()
+    for delay in (30, 150):
+        first.add(delay)
+    second.add(-180)
+    first.merge(second)
+    assert (first.count, first.max_delay, first.delayed, first.early) == (3, 150, 1, 1)
+    assert first.mean() == 0
+
+
+def test_analyze_merges_maps(tmp_path):
+    (tmp_path / 'a.log').write_text(MAP_A)
+    (tmp_path / 'b.log').write_text(MAP_B)
+    paths = [str(tmp_path / 'a.log'), str(tmp_path / 'b.log')]
+
+    report = analyze(paths, workers=2)
+
+    assert sorted(report.files) == ['a.log', 'b.log']
+    assert report.lines == 5
+    # the same contract id on two maps stays two contracts
+    assert report.contracts[('a.log', '123')].count == 3
+    assert report.contracts[('b.log', '123')].count == 1
+    assert report.stations['Alpha'].count == 3
+    assert report.stations['Alpha'].max_delay == 90
+    assert report.stations['Beta'].delayed == 1
+    assert analyze(paths, workers=1).as_dict()['stations'] == report.as_dict()['stations']
+
+
+def test_analyze_counts_every_run(tmp_path):
+    # five runs of the same two train ids; the state keeps only the last run of each, the report all of them
+    runs = []
+    for run in range(5):
+        for tid in ('IC123-1', 'IC123-2'):
+            for idx, station in enumerate(('Alpha', 'Beta', 'Gamma')):
+                delay = 600 if (run, tid, station) == (2, 'IC123-1', 'Beta') else run * 3 + idx
+                runs.append(f'Delay for train {tid}[{station}]: 00:{delay // 60:02d}:{delay % 60:02d}\n')
+    (tmp_path / 'a.log').write_text(''.join(runs))
+
+    report = analyze([str(tmp_path / 'a.log')], workers=1)
+
+    assert report.contracts[('a.log', '123')].count == 30
+    assert report.contracts[('a.log', '123')].max_delay == 600
+    assert report.stations['Beta'].count == 10
+
+
+def test_directory_and_unreadable_files(tmp_path):
+    (tmp_path / 'a.log').write_text(MAP_A + 'last_read_position: 120 of 7\n')
+    (tmp_path / 'a.log.snapshot').write_bytes(b'\x80\x04\x95')
+    (tmp_path / 'stops.npz').write_bytes(b'PK\x03\x04\xff\xfe')
+    (tmp_path / 'monitor.log').write_text('INFO Tailing Player.log using inotify\n')
+    assert history_files(str(tmp_path)) == [str(tmp_path / 'a.log')]
+
+    # a broken file is reported, the others are still analysed
+    (tmp_path / 'b.log').write_bytes(MAP_B.encode() + b'\xff\xfe\n')
+    for workers in (1, 2):
+        report = analyze([str(tmp_path / 'a.log'), str(tmp_path / 'b.log')], workers=workers)
+        assert report.files == ['a.log'] and report.lines == 4
+        assert [name for name, _ in report.errors] == ['b.log']
+        assert 'UnicodeDecodeError' in report.format()[1]
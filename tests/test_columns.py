@@ -0,0 +1,30 @@
+from columns import from_history
+
+HISTORY = """Delay for train IC123-1[Alpha]: 00:00:30
+noise
+Delay for train IC123-1[Beta]: 00:02:30
+Delay for train IC123-1[Beta]: 00:02:30
+Delay for train IC123-2[Alpha]: -00:03:00
+Delay for train IC123-2[Beta]: -00:01:00
+Delay for train IC123-1[Alpha]: 00:01:00
+"""
+
+
+def test_from_history():
+    columns = from_history(HISTORY.splitlines(keepends=True))
+
+    # the repeated line is not a new stop
+    assert len(columns) == 5
+    assert list(columns.seq) == [0, 2, 4, 5, 6]
+    assert columns.contracts == ['123']
+    assert columns.locations == ['Alpha', 'Beta']
+    assert list(columns.location) == [0, 1, 0, 1, 0]
+    assert list(columns.delay) == [30, 150, -180, -60, 60]
+
+
+def test_train_runs():
+    columns = from_history(HISTORY.splitlines(keepends=True))
+
+    # IC123-1 finished its run at Beta, the next IC123-1 is a new run
+    assert columns.trains == ['IC123-1', 'IC123-2', 'IC123-1']
+    assert list(columns.train) == [0, 0, 1, 1, 2]
@@ -0,0 +1,229 @@
+import random
+
+import pytest
+
+from contract import Contract, Retention, StopAggregate
+
+
+def run_route(contract, tid, stops):
+    for location, delay in stops:
+        contract.new_location_for_train(tid, location, delay)
+    return contract.purge_trains()
+
+
+def test_delay_info():
+    contract = Contract('123', 'IC')
+    assert contract.get_delay_info() == '____'
+
+    run_route(contract, 'IC123-1', [('A', 0), ('B', 200), ('C', 70)])
+    run_route(contract, 'IC123-2', [('A', -130), ('B', 0), ('C', 0)])
+    assert contract.route_complete
+    assert not contract.is_active()
+    assert contract.get_delay_info() == '!*__'
+
+    run_route(contract, 'IC123-3', [('A', 90), ('B', -70)])
+    assert contract.get_delay_info() == '!*?+'
+
+    run_route(contract, 'IC123-3', [('C', 0)])
+    assert contract.get_delay_info() == '!*__'
+
+
+def test_delay_info_follows_reruns_and_eviction():
+    contract = Contract('123', 'IC')
+    run_route(contract, 'IC123-1', [('A', 0), ('B', 200), ('C', 0)])
+    run_route(contract, 'IC123-2', [('A', 0), ('B', 0), ('C', 0)])
+    assert contract.get_delay_info() == '!___'
+
+    # the clean rerun of IC123-1 replaces its delayed run
+    run_route(contract, 'IC123-1', [('A', 0), ('B', 0), ('C', 0)])
+    assert contract.get_delay_info() == '____'
+
+    run_route(contract, 'IC123-3', [('A', -130), ('B', 0), ('C', 0)])
+    assert contract.get_delay_info() == '_*__'
+    contract.retention = Retention(2, None)
+    contract.evict_trains()
+    assert list(contract.completed_trains) == ['IC123-1', 'IC123-3']
+    contract.retention = Retention(1, None)
+    contract.evict_trains()
+    assert contract.get_delay_info() == '_*__'
+    contract.retention = Retention(0, None)
+    contract.evict_trains()
+    # evicted trains keep counting
+    assert contract.get_delay_info() == '_*__'
+
+
+def test_delay_info_survives_eviction():
+    contract = Contract('123', 'IC', retention=Retention(1, None))
+    run_route(contract, 'IC123-1', [('A', 0), ('B', 300), ('C', 0)])
+    run_route(contract, 'IC123-2', [('A', 0), ('B', 0), ('C', 0)])
+    run_route(contract, 'IC123-3', [('A', 0), ('B', 0), ('C', 0)])
+    assert list(contract.completed_trains) == ['IC123-3']
+    assert contract.evicted['B'].delayed() == 1
+    assert contract.get_delay_info() == '!___'
+
+
+class LegacyContract(Contract):
+    """The route detection that scanned all trains on every arrival, as the reference for the fingerprint index."""
+    repairs = 0
+    reopens = 0
+
+    def check_for_complete_route(self, length) -> bool:
+        handled_routes = {}
+        for train_id, train in self.trains.items():
+            tuple_list = tuple(train.locations())
+            if len(tuple_list) < length:
+                continue
+            if tuple_list in handled_routes:
+                self.route = list(train.locations())
+                self.line_leaders = [train_id, handled_routes[tuple_list]]
+                self.route_complete = True
+                for _, train_2 in self.trains.items():
+                    train_2.finalize(self.end_of_route())
+                return True
+            else:
+                handled_routes[tuple_list] = train_id
+        return False
+
+    def update_route(self, tid) -> bool:
+        longest_route_length = self.length_of_route()
+        longest_route_id = None
+        for train_id, train in self.trains.items():
+            if train.num_locations() > longest_route_length:
+                longest_route_length = train.num_locations()
+                longest_route_id = train.tid
+
+        if longest_route_length > self.length_of_route():
+            if self.route_complete:
+                self.reopens += 1
+            self.route_complete = False
+            self.route = list(self.trains[longest_route_id].locations())
+            for train_id, train in self.trains.items():
+                train.done = False
+        if not self.route_complete:
+            return self.check_for_complete_route(longest_route_length)
+        return False
+
+    def repair_line_leader(self, train):
+        if train.tid in self.line_leaders and train.current_location() not in self.route:
+            self.repairs += 1
+        super().repair_line_leader(train)
+
+
+def simulated_arrivals(seed, num_arrivals):
+    # trains run a fixed route, but may enter it late, take a detour or run beyond the end of the route
+    rng = random.Random(seed)
+    route = [f'Station {idx}' for idx in range(rng.randrange(1, 8))]
+    running = {}
+    for _ in range(num_arrivals):
+        free = [idx for idx in range(8) if f'IC123-{idx}' not in running]
+        if free and (not running or rng.random() < 0.2):
+            stops = list(route[rng.randrange(len(route)) if rng.random() < 0.1 else 0:])
+            if rng.random() < 0.1:
+                stops[rng.randrange(len(stops))] = f'Station {rng.randrange(12)}'
+            if rng.random() < 0.1:
+                stops.append(f'Station {rng.randrange(12)}')
+            running[f'IC123-{rng.choice(free)}'] = stops
+        tid = rng.choice(list(running))
+        location = running[tid].pop(0)
+        if not running[tid]:
+            del running[tid]
+        yield tid, location, rng.randrange(-200, 300)
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_route_detection_matches_full_scan(seed):
+    contract = Contract('123', 'IC')
+    reference = LegacyContract('123', 'IC')
+    for tid, location, delay in simulated_arrivals(seed, 300):
+        assert contract.new_location_for_train(tid, location, delay) == \
+               reference.new_location_for_train(tid, location, delay)
+        assert [t.tid for t in contract.purge_trains()] == [t.tid for t in reference.purge_trains()]
+        assert contract.route == reference.route
+        assert contract.route_complete == reference.route_complete
+        assert contract.line_leaders == reference.line_leaders
+        assert [(t.tid, t.done) for t in contract.trains.values()] == \
+               [(t.tid, t.done) for t in reference.trains.values()]
+    assert [t.stops() for t in contract.trains.values()] == [t.stops() for t in reference.trains.values()]
+
+
+def test_route_detection_covers_reopen_and_repair():
+    reopens, repairs = 0, 0
+    for seed in range(40):
+        reference = LegacyContract('123', 'IC')
+        for tid, location, delay in simulated_arrivals(seed, 300):
+            reference.new_location_for_train(tid, location, delay)
+            reference.purge_trains()
+        reopens += reference.reopens
+        repairs += reference.repairs
+    assert reopens > 0
+    assert repairs > 0
+
+
+def detail_columns_without_cache(contract):
+    columns = [[('Station       ', 0)] + [(f'{location[0:14]:14}', 0) for location in contract.route]]
+    for train in sorted(contract.completed_trains.values(), key=lambda t: t.time_of_birth()):
+        if train.tid not in contract.trains:
+            columns.append(contract.make_train_detail(train))
+    for train in sorted(contract.trains.values(), key=lambda t: t.time_of_birth()):
+        columns.append(contract.make_train_detail(train))
+    return columns
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_detail_view_cache(seed):
+    contract = Contract('123', 'IC')
+    for step, (tid, location, delay) in enumerate(simulated_arrivals(seed, 300)):
+        contract.new_location_for_train(tid, location, delay)
+        contract.purge_trains()
+        if step % 7 == 0 and contract.route_complete:
+            title, columns = contract.make_detail_view()
+            assert title.startswith('Detail for contract 123 (')
+            assert columns == detail_columns_without_cache(contract)
+
+
+def test_stop_aggregate():
+    aggregate = StopAggregate()
+    for delay in (-200, -60, 0, 60, 61, 500):
+        aggregate.add(delay)
+    assert list(aggregate.histogram) == [1, 1, 1, 1, 1, 0, 1]
+    assert (aggregate.count, aggregate.max_delay, aggregate.delayed(), aggregate.early()) == (6, 500, 2, 2)
+
+
+def test_retention_by_count():
+    contract = Contract('123', 'IC', retention=Retention(2, None))
+    for run in range(5):
+        run_route(contract, f'IC123-{run}', [('A', 0), ('B', 100 * run), ('C', 0)])
+    # the first two trains close the route, the others complete at C
+    assert list(contract.completed_trains) == ['IC123-3', 'IC123-4']
+    assert contract.evicted_trains == 3
+    assert contract.evicted['B'].count == 3
+    assert contract.evicted['B'].mean() == 100
+    assert contract.get_delay_info() == '!___'
+
+    _, columns = contract.make_detail_view()
+    assert len(columns) == 4
+    assert columns[1] == [('   3 old', 0), ('       0', 0), ('     100', 1), ('       0', 0)]
+
+
+def test_retention_folds_reruns():
+    contract = Contract('123', 'IC', retention=Retention(5, None))
+    run_route(contract, 'IC123-1', [('A', 0), ('B', 600), ('C', 0)])
+    run_route(contract, 'IC123-2', [('A', 0), ('B', 0), ('C', 0)])
+    run_route(contract, 'IC123-1', [('A', 0), ('B', 10), ('C', 0)])
+    # the rerun replaces the first run of IC123-1, which is summarised instead of lost
+    assert list(contract.completed_trains) == ['IC123-2', 'IC123-1']
+    assert contract.evicted_trains == 1
+    assert (contract.evicted['B'].count, contract.evicted['B'].max_delay) == (1, 600)
+    _, columns = contract.make_detail_view()
+    assert columns[1][0] == ('   1 old', 0)
+
+
+def test_retention_by_age():
+    contract = Contract('123', 'IC')
+    for run in range(3):
+        run_route(contract, f'IC123-{run}', [('A', 0), ('B', 0)])
+    births = [train.time_of_birth() for train in contract.completed_trains.values()]
+    contract.retention = Retention(None, 10)
+    contract.evict_trains(now=births[1] + int(10e9))
+    assert list(contract.completed_trains) == ['IC123-1', 'IC123-2']
+    assert contract.memory_usage() > 0
@@ -0,0 +1,38 @@
+from history import HistoryWriter
+from replay import replay
+
+
+def test_batches_with_marker(tmp_path, clock):
+    path = tmp_path / 'history.log'
+    writer = HistoryWriter(path, max_buffer=100, max_delay=5, clock=clock)
+
+    writer.append('Delay for train IC123-1[Alpha]: 00:02:00\n')
+    assert not writer.maybe_flush(42, 7)
+    assert path.read_text() == ''
+
+    clock.now = 6
+    assert writer.maybe_flush(42, 7)
+    assert path.read_text() == 'Delay for train IC123-1[Alpha]: 00:02:00\nlast_read_position: 42 of 7\n'
+    assert not writer.maybe_flush(42, 7)
+
+    writer.append('x' * 100 + '\n')
+    assert writer.maybe_flush(143, 7)
+    writer.flush(143, 7)
+    writer.close()
+    assert path.read_text().endswith('last_read_position: 143 of 7\nlast_read_position: 143 of 7\n')
+
+    state = replay(path)
+    assert (state.start_pos, state.last_file_number) == (143, 7)
+    assert list(state.delays) == ['IC123-1']
+
+
+def test_recognised_only(tmp_path):
+    path = tmp_path / 'history.log'
+    writer = HistoryWriter(path, recognised_only=True)
+    for line in ['noise\n', 'Bad platform for train IC123-1\n', '\n', 'Delay for train IC123-1[Alpha]: 00:00:00\n']:
+        writer.append(line)
+    writer.flush(10, 1)
+    writer.close()
+
+    assert path.read_text() == ('Bad platform for train IC123-1\nDelay for train IC123-1[Alpha]: 00:00:00\n'
+                                'last_read_position: 10 of 1\n')
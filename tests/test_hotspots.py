@@ -0,0 +1,41 @@
+import pytest
+
+from hotspots import Hotspot, HotspotIndex
+from state import State
+
+
+def test_hotspot_aggregate():
+    hotspot = Hotspot('Alpha')
+    for delay in (100, 0, 50):
+        hotspot.add(delay)
+
+    assert hotspot.count == 3
+    assert hotspot.mean == pytest.approx(50)
+    assert hotspot.max_delay == 100
+    assert hotspot.recent == pytest.approx(0.8 * 0.8 * 100 + 0.2 * 50)
+
+
+def test_index_ranks_by_total_delay():
+    index = HotspotIndex()
+    index.add('Alpha', 200)
+    index.add('Beta', 150)
+    index.add('Beta', 100)
+    index.add('Gamma', -30)
+
+    assert [hotspot.name for hotspot in index.top(2)] == ['Beta', 'Alpha']
+    assert index.get('Beta').count == 2
+    assert index.get('Delta') is None
+    assert len(index) == 3
+
+
+def test_state_hotspots():
+    state = State()
+    for line in ['Delay for train IC123-1[Alpha]: 00:00:30\n',
+                 'Delay for train IC123-1[Beta]: 00:02:30\n',
+                 'Delay for train IC456-1[Beta]: 00:01:00\n',
+                 'Delay for train IC456-1[Gamma]: 00:00:40\n']:
+        state.process_line(line)
+
+    assert [(h.name, h.count) for h in state.hotspots.top(3)] == [('Beta', 2), ('Gamma', 1), ('Alpha', 1)]
+    assert state.segments.get(('Alpha', 'Beta')).mean == 120
+    assert state.segments.get(('Beta', 'Gamma')).mean == -20
@@ -0,0 +1,193 @@
+import time
+import select
+import threading
+
+import ingest
+from contract import Retention
+from history import HistoryWriter
+from ingest import Ingester
+from notifier import Notifier, MemorySink
+from perf import PerfCounters, Profiler
+from replay import replay
+from state import State
+from tailer import Tailer
+
+LOG = """Delay for train IC123-1[Alpha]: 00:00:30
+Delay for train IC123-1[Beta]: 00:02:30
+Bad platform for train IC123-2
+"""
+
+
+def wait_for_changes(ingester, done, timeout=5):
+    """Collects change sets until done(collected) holds."""
+    collected = []
+    while not done(collected):
+        assert select.select([ingester.wakeup], [], [], timeout)[0], 'no change set published'
+        collected += ingester.drain()
+    return collected
+
+
+def statuses(collected):
+    return [message for changes in collected for message in changes.statuses]
+
+
+def make_ingester(tmp_path, **kwargs):
+    path = tmp_path / 'Player.log'
+    path.write_text('')
+    sink = MemorySink()
+    ingester = Ingester(Tailer(str(path)), State(), Notifier(sink, min_interval=0).start(), PerfCounters(),
+                        Profiler(prefix=str(tmp_path / 'profile')), **kwargs)
+    return path, ingester, sink
+
+
+def test_ingest_in_background(tmp_path):
+    path, ingester, sink = make_ingester(tmp_path)
+    ingester.start()
+    with open(path, "a") as f:
+        f.write(LOG)
+    collected = wait_for_changes(ingester, lambda collected: sum(changes.lines for changes in collected) == 3)
+    ingester.stop()
+    ingester.notifier.stop()
+    ingester.close()
+
+    assert ingester.error is None
+    assert set().union(*(changes.dirty for changes in collected)) >= {'delay', 'recent', 'active_contract'}
+    assert statuses(collected) == ['IC123-2: Bad platform!']
+    assert ingester.state.lines_processed == 3
+    assert list(ingester.state.delays) == ['IC123-1']
+    assert sink.notifications == [('IC123-1 delayed', f'IC123-1 delayed at {"Beta":16} by 150.0')]
+    assert ingester.perf.lines == 3
+
+
+def test_batches_release_the_lock(tmp_path):
+    path, ingester, _ = make_ingester(tmp_path)
+    ingester.MAX_BATCH_SECONDS = 0
+    ingester.BATCH_CHECK = 1
+    with open(path, "a") as f:
+        f.write(LOG)
+    acquired = []
+    lock = ingester.lock
+
+    class CountingLock:
+        def __enter__(self):
+            acquired.append(True)
+            return lock.__enter__()
+
+        def __exit__(self, *exc):
+            return lock.__exit__(*exc)
+
+    ingester.lock = CountingLock()
+    ingester.step()
+    collected = ingester.drain()
+    ingester.notifier.stop()
+    ingester.close()
+
+    assert len(acquired) == 3  # one line per batch
+    assert [changes.lines for changes in collected] == [1, 1, 1]
+
+
+def test_full_queue_keeps_collecting(tmp_path):
+    path, ingester, _ = make_ingester(tmp_path, max_queue=1)
+    with open(path, "a") as f:
+        f.write('Bad platform for train IC123-1\n')
+    ingester.step()
+    with open(path, "a") as f:
+        f.write('Bad platform for train IC123-2\n')
+    ingester.step()
+    first = ingester.drain()
+    ingester.step()  # nothing new to read, publishes what did not fit into the queue
+    second = ingester.drain()
+    ingester.notifier.stop()
+    ingester.close()
+
+    assert [changes.statuses for changes in first] == [('IC123-1: Bad platform!',)]
+    assert [changes.statuses for changes in second] == [('IC123-2: Bad platform!',)]
+
+
+def test_profile_runs_in_ingest_thread(tmp_path):
+    _, ingester, _ = make_ingester(tmp_path)
+    threads = []
+    start = ingester.profiler.start
+    ingester.profiler.start = lambda duration: (threads.append(threading.current_thread().name), start(duration))
+    ingester.request_profile(0)
+    ingester.start()
+    collected = wait_for_changes(ingester, lambda collected: any(message.startswith('Wrote')
+                                                                 for message in statuses(collected)))
+    ingester.stop()
+    ingester.notifier.stop()
+    ingester.close()
+
+    assert threads == ['ingest']
+    assert statuses(collected)[0] == 'Profiling for 0s'
+
+
+def test_snapshot_does_not_hold_the_lock(tmp_path, monkeypatch):
+    history_path = str(tmp_path / 'history.log')
+    path, ingester, _ = make_ingester(tmp_path, history=HistoryWriter(history_path), history_path=history_path)
+    locked = []
+    monkeypatch.setattr(ingest, 'save_snapshot', lambda *args: locked.append(ingester.lock.locked()))
+    monkeypatch.setattr(ingest, 'SNAPSHOT_INTERVAL', -1)
+    with open(path, "a") as f:
+        f.write(LOG)
+    ingester.step()
+    ingester.maybe_write_snapshot()
+    monkeypatch.undo()
+    ingester.notifier.stop()
+    ingester.close()
+
+    assert locked == [False]
+
+
+def test_failed_line_is_read_again_after_restart(tmp_path, monkeypatch):
+    history_path = str(tmp_path / 'history.log')
+    path, ingester, _ = make_ingester(tmp_path, history=HistoryWriter(history_path), history_path=history_path)
+    process_log_line = ingest.process_log_line
+
+    def failing(state, line, *args):
+        if 'Beta' in line:
+            raise ValueError(line)
+        return process_log_line(state, line, *args)
+
+    monkeypatch.setattr(ingest, 'process_log_line', failing)
+    with open(path, "a") as f:
+        f.write(LOG)
+    ingester.start()
+    wait_for_changes(ingester, lambda collected: ingester.error is not None)
+    ingester.stop()
+    ingester.notifier.stop()
+    ingester.close()
+    monkeypatch.undo()
+
+    # the history holds the line applied before the failure, marked as read up to there, and no snapshot
+    state = replay(history_path)
+    assert state.lines_processed == 2
+    assert not (tmp_path / 'history.log.snapshot').exists()
+    tailer = Tailer(str(path))
+    tailer.seek(state.start_pos)
+    assert tailer.read_lines() == LOG.splitlines(keepends=True)[1:]
+    tailer.close()
+
+
+def test_sweep_evicts_expired_trains(tmp_path, monkeypatch):
+    path, ingester, _ = make_ingester(tmp_path)
+    ingester.state.set_retention(Retention(None, 3600))
+    with open(path, "a") as f:
+        f.write("Delay for train IC123-1[Alpha]: 00:00:30\nDelay for train IC123-1[Beta]: 00:02:30\n"
+                "Delay for train IC123-2[Alpha]: 00:00:00\nDelay for train IC123-2[Beta]: 00:00:00\n")
+    ingester.step()
+    ingester.drain()
+    contract = ingester.state.contracts['123']
+    assert list(contract.completed_trains) == ['IC123-1', 'IC123-2']
+
+    # no further arrivals: the periodic sweep evicts the train once it is older than an hour
+    now = time.time_ns()
+    monkeypatch.setattr(time, 'time_ns', lambda: now + int(2 * 3600e9))
+    monkeypatch.setattr(ingest, 'SNAPSHOT_INTERVAL', -1)
+    ingester.maybe_write_snapshot()
+    monkeypatch.undo()
+    collected = ingester.drain()
+    ingester.notifier.stop()
+    ingester.close()
+
+    assert list(contract.completed_trains) == [] and contract.evicted_trains == 2
+    assert {'active_contract', 'inactive_contract'} <= set().union(*(changes.dirty for changes in collected))
@@ -0,0 +1,24 @@
+import pytest
+
+from logparser import classify, get_contract_id, DelayEvent, BadPlatformEvent, MarkerEvent
+
+
+@pytest.mark.parametrize("line, event", [
+    ("Delay for train IC123-1[Alpha Beta]: 00:02:30\n", DelayEvent('IC123-1', 'Alpha Beta', 150)),
+    ("[Train] Delay for train Reg456A1[X]: -01:00:05\n", DelayEvent('Reg456A1', 'X', -3605)),
+    ("Delay for train IC123-1[Alpha]: garbage\n", DelayEvent('IC123-1', 'Alpha', 0)),
+    ("Bad platform for train IC123-2\n", BadPlatformEvent('IC123-2')),
+    ("last_read_position: 1234 of 99\n", MarkerEvent(1234, 99)),
+    ("Delay for train without location\n", None),
+    ("UnityEngine.Logger:Log(LogType, Object)\n", None),
+    ("\n", None),
+])
+def test_classify(line, event):
+    assert classify(line) == event
+
+
+def test_get_contract_id():
+    assert get_contract_id('IC123-1') == ('IC', '123')
+    assert get_contract_id('Reg456A1') == ('Reg', '456A')
+    with pytest.raises(ValueError):
+        get_contract_id('???')
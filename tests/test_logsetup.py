@@ -0,0 +1,51 @@
+import logging
+
+import pytest
+
+from logsetup import setup_logging
+
+
+class Expensive:
+    formatted = 0
+
+    def __str__(self):
+        Expensive.formatted += 1
+        return 'expensive'
+
+
+@pytest.fixture
+def restore_root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def test_records_written_by_listener(tmp_path, restore_root_logger):
+    path = tmp_path / 'app.log'
+    listener = setup_logging(str(path), 'INFO')
+    logging.info('Closing route %s', 'IC 1')
+    Expensive.formatted = 0
+    logging.debug('not enabled: %s', Expensive())
+    listener.stop()
+
+    contents = path.read_text()
+    assert 'INFO - Closing route IC 1' in contents
+    assert 'not enabled' not in contents
+    assert Expensive.formatted == 0
+
+
+def test_rotation(tmp_path, restore_root_logger):
+    path = tmp_path / 'app.log'
+    listener = setup_logging(str(path), logging.DEBUG, max_bytes=1000, backup_count=2)
+    for i in range(100):
+        logging.debug('line %d of the log', i)
+    listener.stop()
+
+    assert (tmp_path / 'app.log.1').exists()
+    assert not (tmp_path / 'app.log.3').exists()
+    assert path.stat().st_size <= 1000
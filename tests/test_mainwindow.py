@@ -0,0 +1,48 @@
+import curses
+
+import pytest
+
+from mainwindow import DetailedPopup
+
+
+@pytest.fixture
+def screen(fake_curses, monkeypatch):
+    monkeypatch.setattr(curses, 'LINES', 30, raising=False)
+    monkeypatch.setattr(curses, 'COLS', 80, raising=False)
+    monkeypatch.setattr(curses, 'color_pair', lambda idx: idx)
+
+
+def make_columns(num_stations, num_trains):
+    columns = [[('Station', 0)] + [(f'S{row}', 0) for row in range(1, num_stations + 1)]]
+    for train in range(1, num_trains + 1):
+        columns.append([(f'T{train}', 0)] + [(f'{train}/{row}', 0) for row in range(1, num_stations + 1)])
+    return columns
+
+
+def drawn_cells(popup):
+    return {call[3] for call in popup.popup.calls if call[0] == 'addstr' and call[1] > 0}
+
+
+def test_detail_popup_draws_viewport_only(screen):
+    popup = DetailedPopup('Detail', make_columns(40, 300))
+
+    cells = drawn_cells(popup)
+    assert len(cells) < 150
+    assert {'Station', 'S1', 'T1', '1/1'} <= cells
+    assert '300/40' not in cells
+
+    popup.handle_input(None, curses.KEY_END)
+    popup.popup.calls.clear()
+    popup.handle_input(None, curses.KEY_DOWN)
+    cells = drawn_cells(popup)
+    # the station names and train ids stay in place
+    assert {'Station', 'S2', 'T300', '300/2'} <= cells
+    assert 'S1' not in cells and 'T1' not in cells
+
+
+def test_detail_popup_end_marker(screen):
+    columns = make_columns(3, 1)
+    columns[1][3] = None
+    popup = DetailedPopup('Detail', columns)
+
+    assert '       *' in drawn_cells(popup)
@@ -0,0 +1,38 @@
+import threading
+
+from notifier import Notifier, MemorySink
+
+
+def test_coalesce_per_key(clock):
+    sink = MemorySink()
+    notifier = Notifier(sink, coalesce_window=60, min_interval=0, clock=clock).start()
+
+    assert notifier.notify('123', 'IC123-1 delayed', 'first')
+    assert not notifier.notify('123', 'IC123-2 delayed', 'second')
+    assert notifier.notify('456', 'IC456-1 delayed', 'other contract')
+    clock.now = 61
+    assert notifier.notify('123', 'IC123-1 delayed', 'third')
+    notifier.stop()
+
+    assert sink.notifications == [('IC123-1 delayed', 'first'), ('IC456-1 delayed', 'other contract'),
+                                  ('IC123-1 delayed', 'third (+1 more)')]
+    assert notifier.coalesced == 1
+
+
+def test_drop_and_summarize_when_full():
+    release = threading.Event()
+    sink = MemorySink()
+
+    def slow_sink(title, message):
+        release.wait()
+        sink(title, message)
+
+    notifier = Notifier(slow_sink, max_queue=2, coalesce_window=0, min_interval=0).start()
+    for idx in range(10):
+        notifier.notify(idx, f'{idx}', 'delayed')
+    release.set()
+    notifier.stop()
+
+    assert notifier.dropped >= 7
+    assert sink.notifications[-1] == ('Delays suppressed', f'{notifier.dropped} more delay alerts were not shown')
+    assert len(sink.notifications) == 10 - notifier.dropped + 1
@@ -1,3 +1,5 @@
+import curses
+
 import pytest
 from pad import Pad, PadSize
 
@@ -8,3 +10,96 @@ def test_pad_create():
 
     assert pad.height() == 50
     assert pad.width()  == 30
+
+
+@pytest.fixture
+def sized(fake_curses, monkeypatch):
+    monkeypatch.setattr(curses, 'LINES', 12, raising=False)
+    monkeypatch.setattr(curses, 'COLS', 40, raising=False)
+    monkeypatch.setattr(Pad, '_max_y', 12)
+    monkeypatch.setattr(Pad, '_max_x', 40)
+    monkeypatch.setattr(Pad, '_num_rows', 1)
+    monkeypatch.setattr(Pad, '_num_columns', 1)
+
+
+def make_pad():
+    pad = Pad(5000, 500, 'Test pad', PadSize(0, 0, 1, 1), color=False)
+    pad.resize()
+    pad._view.calls.clear()
+    return pad
+
+
+def test_pad_update_only_changed_rows(sized):
+    pad = make_pad()
+    for idx, text in enumerate(['one', 'two', 'three']):
+        pad.add_str(idx, 0, text)
+    pad.update_pad()
+    assert [call for call in pad._view.calls if call[0] == 'addstr'] == \
+           [('addstr', 0, 0, 'one'), ('addstr', 1, 0, 'two'), ('addstr', 2, 0, 'three')]
+
+    pad._view.calls.clear()
+    pad.prepare()
+    pad.add_str(0, 0, 'one')
+    pad.add_str(1, 0, 'TWO')
+    pad.update_pad()
+    assert pad._view.calls == [('move', 1, 0), ('clrtoeol',), ('addstr', 1, 0, 'TWO'),
+                               ('move', 2, 0), ('clrtoeol',)]
+
+    pad._view.calls.clear()
+    pad._selected = 0
+    pad.prepare()
+    pad.add_str(0, 0, 'one')
+    pad.add_str(1, 0, 'TWO')
+    pad.update_pad()
+    assert pad._view.calls == [('move', 0, 0), ('clrtoeol',), ('addstr', 0, 0, 'one', 1 << 18)]
+
+
+def test_pad_renders_viewport_only(sized):
+    pad = make_pad()
+    for idx in range(5000):
+        pad.add_str(idx, 0, f'row {idx} ' + 'x' * 100, ref=idx)
+    pad.update_pad()
+
+    assert pad.lines() == 5000
+    written = [call for call in pad._view.calls if call[0] == 'addstr']
+    assert len(written) == pad.content_height() == 10
+    # clipped to the view next to the scrollbar
+    assert len(written[0][3]) == pad.view_width() == 37
+
+    pad._view.calls.clear()
+    pad.update_display_position(Pad.ScrollMode.LINE_DOWN)
+    assert [call[3] for call in pad._view.calls if call[0] == 'addstr'][-1].startswith('row 10 ')
+    pad.set_selection(+1)
+    assert pad.get_selection_reference() == 1
+
+
+def test_pad_source(sized):
+    pad = make_pad()
+    messages = []
+    pad.set_source(messages)
+    messages.extend(['newest', 'older'])
+    pad.update_pad()
+
+    assert pad.lines() == 2
+    assert [call for call in pad._view.calls if call[0] == 'addstr'] == \
+           [('addstr', 0, 0, 'newest'), ('addstr', 1, 0, 'older')]
+
+
+def test_pad_draw_stages_persistent_windows(sized, fake_curses, monkeypatch):
+    windows = []
+    monkeypatch.setattr(curses, 'newwin', lambda *args: windows.append(fake_curses.new_window(*args)) or windows[-1])
+    pad = make_pad()
+    border, view = windows
+    pad.add_str(0, 0, 'one')
+    pad.draw(update=False)
+    pad.add_str(1, 0, 'two')
+    pad.update_pad()
+    pad.draw(update=False)
+
+    # no new windows and nothing written to the terminal before the caller's doupdate
+    assert len(windows) == 2
+    for window in (border, view):
+        assert not [call for call in window.calls if call[0] == 'refresh']
+        assert [call[0] for call in window.calls].count('noutrefresh') == 2
+    # only the first draw after resize copies the whole windows
+    assert [call[0] for call in view.calls].count('touchwin') == 1
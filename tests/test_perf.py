@@ -0,0 +1,21 @@
+import pytest
+
+from perf import PerfCounters
+
+
+def test_stage_percentiles_and_rate(clock):
+    perf = PerfCounters(clock)
+    for duration in range(1, 101):
+        start = perf.start()
+        clock.now += duration / 1000
+        perf.stop('parse', start)
+    perf.add_lines(300)
+    perf.update_rate()
+
+    assert perf.percentile('parse', 50) == pytest.approx(0.051)
+    assert perf.percentile('parse', 99) == pytest.approx(0.1)
+    assert perf.percentile('draw', 99) == 0.0
+    assert perf.lines_per_second == pytest.approx(300 / clock.now)
+    summary = perf.summary()
+    assert summary['stages']['parse']['count'] == 100
+    assert summary['lines'] == 300
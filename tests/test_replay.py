@@ -0,0 +1,42 @@
+from replay import replay
+
+HISTORY = """Some unity noise
+Delay for train IC123-1[Alpha]: 00:00:30
+Delay for train IC123-1[Beta]: 00:02:30
+Delay for train IC123-2[Alpha]: -00:03:00
+Delay for train Reg456A1[Gamma]: 00:01:10
+Bad platform for train IC123-2
+Delay for train IC123-1[Gamma]: 00:00:10
+Delay for train IC123-2[Beta]: 00:00:00
+Delay for train IC123-2[Gamma]: 00:00:00
+last_read_position: 1234 of 99
+"""
+
+
+def test_replay(tmp_path):
+    history = tmp_path / 'history.log'
+    history.write_text(HISTORY)
+
+    state = replay(history)
+
+    assert state.lines_processed == 10
+    assert sorted(state.contracts) == ['123', '456A']
+    assert state.contracts['123'].route == ['Alpha', 'Beta', 'Gamma']
+    assert state.contracts['123'].route_complete
+    assert not state.contracts['123'].is_active()
+    assert list(state.delays) == ['Reg456A1']
+    assert not state.early
+    assert (state.start_pos, state.last_file_number) == (1234, 99)
+
+
+def test_duplicate_window(tmp_path):
+    # the same arrival is dropped while it is within the last 200 arrivals, and counted again after that
+    lines = ['Delay for train IC123-1[Alpha]: 00:00:30\n'] * 2
+    lines += [f'Delay for train Reg456A{idx}[Beta]: 00:00:00\n' for idx in range(200)]
+    lines.append('Delay for train IC123-1[Alpha]: 00:00:30\n')
+    history = tmp_path / 'history.log'
+    history.write_text(''.join(lines))
+
+    state = replay(history)
+
+    assert state.hotspots.get('Alpha').count == 2
@@ -0,0 +1,38 @@
+from scheduler import RenderScheduler
+
+
+def test_coalesce_and_rate_limit(clock):
+    clock.now = 100.0
+    frames = []
+    scheduler = RenderScheduler(frames.append, fps=10, clock=clock)
+
+    assert not scheduler.tick()
+    scheduler.mark_dirty('delay')
+    assert scheduler.tick()
+    assert frames == [{'delay'}]
+
+    for pad_id in ['delay', 'early', 'delay', 'recent']:
+        scheduler.mark_dirty(pad_id)
+        assert not scheduler.tick()
+    clock.now += 0.05
+    assert not scheduler.tick()
+    clock.now += 0.05
+    assert scheduler.tick()
+    assert frames[-1] == {'delay', 'early', 'recent'}
+    assert not scheduler.tick()
+
+    assert scheduler.frames_rendered == 2
+    assert scheduler.frames_skipped == 3
+
+
+def test_flush_ignores_rate_limit(clock):
+    clock.now = 100.0
+    frames = []
+    scheduler = RenderScheduler(frames.append, fps=1, clock=clock)
+    scheduler.mark_dirty('delay')
+    scheduler.tick()
+    scheduler.mark_dirty('early')
+
+    assert scheduler.time_until_next_frame() == 1
+    assert scheduler.flush()
+    assert frames == [{'delay'}, {'early'}]
@@ -0,0 +1,102 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+from server import StatePublisher, serve
+from state import State
+
+LOG = """Delay for train IC123-1[Alpha]: 00:00:30
+Delay for train IC123-1[Beta]: 00:02:30
+Delay for train IC123-2[Alpha]: -00:03:00
+Delay for train Reg456A1[Gamma]: 00:01:10
+Delay for train IC123-1[Gamma]: 00:00:10
+Delay for train IC123-2[Beta]: 00:00:00
+Delay for train IC123-2[Gamma]: 00:00:00
+"""
+
+
+def apply(state, publisher, text):
+    for line in text.splitlines(keepends=True):
+        arrival = state.process_line(line)
+        if arrival is not None:
+            publisher.touch(arrival.contract_id)
+
+
+@pytest.fixture
+def published(clock):
+    state = State()
+    publisher = StatePublisher(interval=1, clock=clock)
+    apply(state, publisher, LOG)
+    publisher.publish(state)
+    server = serve(publisher, 0)
+    yield state, publisher, f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def get(url, etag=None):
+    request = urllib.request.Request(url, headers={'If-None-Match': etag} if etag else {})
+    try:
+        with urllib.request.urlopen(request, timeout=5) as response:
+            return response.status, response.headers['ETag'], json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers['ETag'], None
+
+
+def test_lists(published):
+    _, _, url = published
+    status, _, summary = get(url + '/')
+    assert status == 200
+    assert summary == {'version': 1, 'lines_processed': 7, 'contracts': 2, 'active': 1, 'inactive': 1,
+                       'delayed': 1, 'early': 0}
+    assert [contract['id'] for contract in get(url + '/contracts/active')[2]] == ['456A']
+    inactive = get(url + '/contracts/inactive')[2]
+    assert inactive[0]['id'] == '123' and inactive[0]['route_complete'] and inactive[0]['stations'] == 3
+    assert get(url + '/trains/delayed')[2] == [{'train': 'Reg456A1', 'location': 'Gamma', 'delay': 70.0}]
+    assert get(url + '/trains/early')[2] == []
+    assert get(url + '/nothing')[0] == 404
+    assert get(url + '/contracts/999')[0] == 404
+
+
+def test_contract_detail(published):
+    _, _, url = published
+    detail = get(url + '/contracts/123')[2]
+    assert detail['route'] == ['Alpha', 'Beta', 'Gamma']
+    assert [(train['train'], train['active'], train['delays']) for train in detail['trains']] == [
+        ('IC123-1', False, [30.0, 150.0, 10.0]), ('IC123-2', False, [-180.0, 0.0, 0.0])]
+    assert detail['evicted'] == {'trains': 0, 'mean': [None, None, None]}
+
+
+def test_etag_and_copy_on_write(published):
+    state, publisher, url = published
+    status, etag, _ = get(url + '/contracts/123')
+    assert get(url + '/contracts/123', etag)[0] == 304
+    _, list_etag, _ = get(url + '/trains/delayed')
+    first = publisher.snapshot
+
+    apply(state, publisher, 'Delay for train Reg456A1[Delta]: 00:03:00\n')
+    assert not publisher.is_due()
+    publisher.clock.now = 1
+    assert publisher.is_due()
+    publisher.publish(state)
+
+    assert publisher.snapshot.contracts['123'] is first.contracts['123']  # untouched contracts are shared
+    assert publisher.snapshot.contracts['456A'] is not first.contracts['456A']
+    assert get(url + '/contracts/123', etag)[0] == 304
+    assert get(url + '/contracts/456A')[2]['route'] == ['Gamma', 'Delta']
+    status, new_etag, delayed = get(url + '/trains/delayed', list_etag)
+    assert status == 200 and new_etag != list_etag
+    assert delayed == [{'train': 'Reg456A1', 'location': 'Delta', 'delay': 180.0}]
+
+
+def test_completed_rows_are_reused(published):
+    state, publisher, _ = published
+    first = publisher.snapshot.contracts['123']
+    apply(state, publisher, 'Delay for train IC123-3[Alpha]: 00:00:00\n')
+    publisher.publish(state)
+    view = publisher.snapshot.contracts['123']
+    assert view is not first
+    assert view.completed['IC123-1'] is first.completed['IC123-1']
+    assert [train.tid for train, _ in view.active] == ['IC123-3']
@@ -0,0 +1,63 @@
+import os
+import pickle
+
+import snapshot
+from replay import replay, replay_file
+from snapshot import save_snapshot, load_snapshot
+from state import State
+
+HEAD = """Delay for train IC123-1[Alpha]: 00:00:30
+Delay for train IC123-1[Beta]: 00:02:30
+Delay for train IC123-2[Alpha]: -00:03:00
+last_read_position: 100 of 7
+"""
+TAIL = """Delay for train IC123-1[Gamma]: 00:00:10
+Delay for train IC123-2[Beta]: 00:00:00
+Delay for train IC123-2[Gamma]: 00:00:00
+last_read_position: 200 of 7
+"""
+
+
+def write_snapshot_after_head(tmp_path):
+    history = tmp_path / 'history.log'
+    history.write_text(HEAD)
+    state = replay(history)
+    path = tmp_path / 'history.log.snapshot'
+    save_snapshot(path, state, os.stat(history).st_size, os.stat(history).st_ino)
+    with open(history, "a") as history_file:
+        history_file.write(TAIL)
+    return history, path
+
+
+def test_snapshot_replays_tail(tmp_path):
+    history, path = write_snapshot_after_head(tmp_path)
+
+    state, offset = load_snapshot(path, history)
+    with open(history, "r") as history_file:
+        history_file.seek(offset)
+        replay_file(history_file, state)
+
+    expected = replay(history)
+    assert state.contracts['123'].route == expected.contracts['123'].route
+    assert state.contracts['123'].route_complete == expected.contracts['123'].route_complete
+    assert state.contracts['123'].get_delay_info() == expected.contracts['123'].get_delay_info()
+    assert list(state.delays) == list(expected.delays)
+    assert list(state.removed_trains) == list(expected.removed_trains)
+    assert (state.start_pos, state.last_file_number) == (200, 7)
+
+
+def test_snapshot_version_mismatch(tmp_path, monkeypatch):
+    history, path = write_snapshot_after_head(tmp_path)
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_VERSION', snapshot.SNAPSHOT_VERSION + 1)
+
+    assert load_snapshot(path, history) is None
+
+
+def test_snapshot_of_other_history(tmp_path):
+    history, path = write_snapshot_after_head(tmp_path)
+    history.write_text(HEAD[:10])
+
+    assert load_snapshot(path, history) is None
+    assert load_snapshot(tmp_path / 'missing.snapshot', history) is None
+    path.write_bytes(pickle.dumps(State())[:20])
+    assert load_snapshot(path, history) is None
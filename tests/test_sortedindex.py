@@ -0,0 +1,21 @@
+import random
+
+from sortedindex import SortedIndex
+
+
+def test_matches_sorted_dict():
+    rng = random.Random(5)
+    index = SortedIndex(key=lambda value: -value)
+    reference = {}
+    for _ in range(2000):
+        item_id = rng.randrange(50)
+        if rng.random() < 0.3:
+            assert index.pop(item_id) == reference.pop(item_id, None)
+        else:
+            value = rng.randrange(-5, 5)
+            index[item_id] = value
+            reference[item_id] = value
+        expected = sorted(reference.items(), key=lambda item: item[1], reverse=True)
+        assert list(index.items()) == expected
+        assert len(index) == len(reference)
+    assert all(item_id in index for item_id in reference)
@@ -0,0 +1,34 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from columns import from_history, load  # noqa: E402
+from stopstats import group_stats, station_stats, worst_segments  # noqa: E402
+
+HISTORY = ''.join(f'Delay for train IC123-{run}[{location}]: 00:0{delay // 60}:{delay % 60:02d}\n'
+                  for run in range(1, 5) for location, delay in (('Alpha', run * 10), ('Beta', run * 10 + 60),
+                                                                  ('Gamma', run * 10 + 70)))
+
+
+def test_group_stats():
+    stats = group_stats([0, 0, 0, 2], [10, -70, 40, 5], 3)
+
+    assert list(stats['count']) == [3, 0, 1]
+    assert stats['mean'][0] == pytest.approx(-20 / 3)
+    assert stats['p50'][0] == 10
+    assert stats['max'][0] == 40
+    assert stats['early_rate'][0] == pytest.approx(1 / 3)
+    assert np.isnan(stats['max'][1])
+    assert stats['p99'][2] == 5
+
+
+def test_export_and_stats(tmp_path):
+    columns = from_history(HISTORY.splitlines(keepends=True))
+    columns.save(tmp_path / 'stops.npz')
+    data = load(tmp_path / 'stops.npz')
+
+    assert list(data['locations']) == ['Alpha', 'Beta', 'Gamma']
+    stats = station_stats(data)
+    assert list(stats['count']) == [4, 4, 4]
+    assert stats['mean'][1] == pytest.approx(85)
+    assert worst_segments(data, top=1) == [('Alpha', 'Beta', 4, 60.0, 60.0)]
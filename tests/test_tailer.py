@@ -0,0 +1,56 @@
+import os
+import time
+import threading
+
+import pytest
+
+from tailer import Tailer
+
+
+@pytest.fixture(params=[True, False], ids=['inotify', 'poll'])
+def tailer(request, tmp_path):
+    path = tmp_path / 'Player.log'
+    path.write_text('')
+    t = Tailer(str(path), use_inotify=request.param)
+    yield t
+    t.close()
+
+
+def append(path, text):
+    with open(path, "a") as f:
+        f.write(text)
+
+
+def test_partial_lines(tailer):
+    append(tailer.path, 'first\nsec')
+    assert tailer.read_lines() == ['first\n']
+    assert tailer.position == 6
+    append(tailer.path, 'ond\r\n')
+    assert tailer.read_lines() == ['second\n']
+    assert tailer.position == 14
+    assert tailer.read_lines() == []
+
+
+def test_truncation_and_rotation(tailer):
+    append(tailer.path, 'one\ntwo\n')
+    tailer.read_lines()
+    with open(tailer.path, "w") as f:
+        f.write('x\n')
+    assert tailer.check_rotation() is not None
+    assert tailer.read_lines() == ['x\n']
+
+    old_file_number = tailer.file_number
+    os.rename(tailer.path, tailer.path + '.prev')
+    append(tailer.path, 'new\n')
+    assert tailer.check_rotation() is not None
+    assert tailer.file_number != old_file_number
+    assert tailer.read_lines() == ['new\n']
+    assert tailer.check_rotation() is None
+
+
+def test_wait_wakes_up_on_append(tailer):
+    threading.Timer(0.05, append, (tailer.path, 'line\n')).start()
+    start = time.monotonic()
+    while not tailer.read_lines():
+        tailer.wait(2)
+    assert time.monotonic() - start < 1
@@ -0,0 +1,22 @@
+import pickle
+
+from train import Train, Stop
+
+
+def test_locations_and_pickle():
+    train = Train('IC123-1', 'Alpha', 0)
+    train.new_location('Beta', 150)
+    locations = train.locations()
+    train.new_location('Gamma', -70)
+
+    assert locations == ['Alpha', 'Beta', 'Gamma']
+    assert locations[1:] == ['Beta', 'Gamma']
+    assert locations.index('Gamma') == 2
+    assert train.stops() == [Stop('Alpha', 0), Stop('Beta', 150), Stop('Gamma', -70)]
+    assert train.delay_levels() == (2, 1)
+
+    copy = pickle.loads(pickle.dumps(train))
+    assert copy.tid == train.tid
+    assert copy.stops() == train.stops()
+    assert copy.time_of_birth() == train.time_of_birth()
+    assert copy.delay_levels() == (2, 1)
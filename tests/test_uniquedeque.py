@@ -0,0 +1,23 @@
+import random
+
+from collections import deque
+
+from uniquedeque import UniqueDeque
+
+
+def test_matches_deque():
+    rng = random.Random(3)
+    unique = UniqueDeque(max_length=20)
+    reference = deque(maxlen=20)
+    for _ in range(5000):
+        item = rng.randrange(60)
+        if rng.random() < 0.3:
+            assert unique.remove(item) == (item in reference)
+            if item in reference:
+                reference.remove(item)
+        else:
+            assert unique.append_left(item) == (item not in reference)
+            if item not in reference:
+                reference.appendleft(item)
+        assert list(unique) == list(reference)
+        assert len(unique) == len(reference)
@@ -1,17 +1,98 @@
+import sys
+import time
+
+from array import array
 from collections import namedtuple
-from datetime import datetime
+from collections.abc import Sequence
 
 Stop = namedtuple("Stop", ["location", "delay"])
 
+# Location names are stored once, trains only keep their index into this table.
+_location_ids = {}
+_location_names = []
+
+
+def location_id(location):
+    lid = _location_ids.get(location)
+    if lid is None:
+        lid = len(_location_names)
+        _location_ids[location] = lid
+        _location_names.append(location)
+    return lid
+
+
+def location_name(lid):
+    return _location_names[lid]
+
+
+def delay_level(delay):
+    if delay > 120:
+        return 2
+    elif delay > 60:
+        return 1
+    return 0
+
+
+def early_level(delay):
+    if delay < -120:
+        return 2
+    elif delay < -60:
+        return 1
+    return 0
+
+
+class LocationView(Sequence):
+    """Read-only view on the locations of a train; use list() to keep a copy."""
+    __slots__ = ('_ids',)
+
+    def __init__(self, ids):
+        self._ids = ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [_location_names[lid] for lid in self._ids[idx]]
+        return _location_names[self._ids[idx]]
+
+    def __iter__(self):
+        return (_location_names[lid] for lid in self._ids)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
 
 class Train:
+    __slots__ = ('tid', '_location_ids', '_delays', '_tob', 'done', '_delay_level', '_early_level', '_fingerprint')
+
     def __init__(self, train_id, location, delay):
         self.tid = train_id
-        self._locations = []
-        self._locations.append(Stop(location, delay))
-        self._tob = datetime.utcnow()  # time of birth
+        self._location_ids = array('I')
+        self._delays = array('f')
+        # worst delay and early arrival over all stops, see delay_level() and early_level()
+        self._delay_level = 0
+        self._early_level = 0
+        self._fingerprint = 0  # rolling hash of the location sequence
+        self.new_location(location, delay)
+        self._tob = time.time_ns()  # time of birth
         self.done = False
 
+    def __getstate__(self):
+        # location ids are only valid within this process, pickle the names
+        return (self.tid, list(self.locations()), self._delays, self._tob, self.done,
+                self._delay_level, self._early_level)
+
+    def __setstate__(self, state):
+        self.tid, locations, self._delays, self._tob, self.done, self._delay_level, self._early_level = state
+        self._location_ids = array('I', [location_id(location) for location in locations])
+        self._fingerprint = 0
+        for lid in self._location_ids:
+            self._fingerprint = hash((self._fingerprint, lid))
+
     def __hash__(self):
         return hash(self.tid)
 
@@ -19,33 +100,55 @@ class Train:
         return self.tid == other.tid
 
     def locations(self):
-        return [L.location for L in self._locations]
+        return LocationView(self._location_ids)
+
+    def location_ids(self):
+        return self._location_ids
+
+    def fingerprint(self):
+        # equal location sequences have equal fingerprints, the reverse needs checking with location_ids()
+        return self._fingerprint
 
     def stops(self) -> list:
-        return self._locations
+        return [Stop(_location_names[lid], delay) for lid, delay in zip(self._location_ids, self._delays)]
 
     def set_route(self, route):
-        self._locations = []
+        self._location_ids = array('I')
+        self._delays = array('f')
+        self._delay_level = 0
+        self._early_level = 0
+        self._fingerprint = 0
         for location in route:
             self.new_location(location, -3.14)
 
     def new_location(self, location, delay):
-        self._locations.append(Stop(location, delay))
+        lid = location_id(location)
+        self._location_ids.append(lid)
+        self._fingerprint = hash((self._fingerprint, lid))
+        self._delays.append(delay)
+        self._delay_level = max(self._delay_level, delay_level(delay))
+        self._early_level = max(self._early_level, early_level(delay))
+
+    def memory_usage(self) -> int:
+        return sys.getsizeof(self) + sys.getsizeof(self._location_ids) + sys.getsizeof(self._delays)
+
+    def delay_levels(self):
+        return self._delay_level, self._early_level
 
     def num_locations(self):
-        return len(self._locations)
+        return len(self._location_ids)
 
     def current_location(self):
-        return self._locations[-1].location
+        return _location_names[self._location_ids[-1]]
 
     def previous_location(self):
-        return self._locations[-2].location
+        return _location_names[self._location_ids[-2]]
 
     def first_location(self):
-        return self._locations[0].location
+        return _location_names[self._location_ids[0]]
 
     def current_delay(self):
-        return self._locations[-1].delay
+        return self._delays[-1]
 
     def time_of_birth(self):
         return self._tob
@@ -67,4 +170,4 @@ class Train:
         return self.done
 
     def __repr__(self):
-        return f"{self.tid}: {self.current_location()}({self.num_locations()}: {self._locations})"
+        return f"{self.tid}: {self.current_location()}({self.num_locations()}: {self.stops()})"
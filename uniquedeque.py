@@ -1,34 +1,38 @@
-from collections import deque
+from collections import OrderedDict
 
 
 class UniqueDeque:
+    """Bounded ordered set, newest item first.
+
+    Backed by an OrderedDict (a linked hash map), so adding, removing, evicting and membership tests are all O(1).
+    """
     def __init__(self, max_length):
-        self.deque = deque(maxlen=max_length)
-        self.items_set = set()  # This helps in checking for uniqueness efficiently
+        self.max_length = max_length
+        self.items = OrderedDict()  # oldest item first
 
     def append_left(self, item):
-        if item not in self.items_set:
-            if len(self.deque) >= self.deque.maxlen:
-                # Remove the item that will be discarded from the set
-                self.items_set.remove(self.deque.pop())
-            self.deque.appendleft(item)
-            self.items_set.add(item)
-            return True
-        else:
+        if item in self.items:
             return False
+        if len(self.items) >= self.max_length:
+            self.items.popitem(last=False)
+        self.items[item] = None
+        return True
 
     def remove(self, item):
-        if item not in self.items_set:
+        if item not in self.items:
             return False
-        else:
-            self.items_set.remove(item)
-            self.deque.remove(item)
-            return True
+        del self.items[item]
+        return True
+
+    def __contains__(self, item):
+        return item in self.items
+
+    def __len__(self):
+        return len(self.items)
 
     def __iter__(self):
         """Make the deque iterable."""
-        return iter(self.deque)
-
+        return reversed(self.items)
 
-def __repr__(self):
-    return str(self.deque)
+    def __repr__(self):
+        return str(list(self))